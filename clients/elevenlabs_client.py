@@ -5,17 +5,72 @@ import os
 from typing import Dict, Optional
 from dotenv import load_dotenv
 from clients.base_tts_client import BaseTTSClient
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 try:
     from elevenlabs.client import ElevenLabs
     from elevenlabs import Voice, VoiceSettings
     ELEVENLABS_AVAILABLE = True
 except ImportError:
-    print("⚠️ ElevenLabs SDK non installé. Exécutez: pip install elevenlabs")
+    logger.warning("⚠️ ElevenLabs SDK non installé. Exécutez: pip install elevenlabs")
     ELEVENLABS_AVAILABLE = False
 
 load_dotenv()
 
+# Styles narratifs disponibles pour le guide touristique
+_NARRATIVE_STYLES = {
+    "enthusiastic": {
+        "stability": 0.2,           # Très expressif
+        "similarity_boost": 0.9,    # Garde l'identité de la voix
+        "style": 0.8,               # Très émotionnel et enthousiaste
+        "use_speaker_boost": True,
+        "description": "Parfait pour présenter des attractions avec passion"
+    },
+    "calm": {
+        "stability": 0.6,           # Plus stable et posé
+        "similarity_boost": 0.8,
+        "style": 0.4,               # Moins d'émotion, plus informatif
+        "use_speaker_boost": True,
+        "description": "Idéal pour les instructions et informations pratiques"
+    },
+    "dramatic": {
+        "stability": 0.1,           # Très variable pour créer du suspense
+        "similarity_boost": 0.9,
+        "style": 0.9,               # Maximum d'émotion
+        "use_speaker_boost": True,
+        "description": "Parfait pour les anecdotes historiques dramatiques"
+    },
+    "informative": {
+        "stability": 0.7,           # Très stable et clair
+        "similarity_boost": 0.7,
+        "style": 0.3,               # Neutre et informatif
+        "use_speaker_boost": True,
+        "description": "Optimal pour les faits, horaires, prix"
+    }
+}
+
+# Paramètres par défaut pour NARRATION TOURISTIQUE (generate_audio sans override)
+_DEFAULT_AUDIO_SETTINGS = {
+    "stability": 0.3,           # Plus bas = plus d'expression et variabilité
+    "similarity_boost": 0.9,    # Plus haut = garde le caractère de la voix
+    "style": 0.7,               # Plus haut = plus d'émotion et enthousiasme
+    "use_speaker_boost": True   # Active l'amplification pour plus de clarté
+}
+
+# Objets VoiceSettings construits une seule fois à l'import : évite la
+# validation du modèle SDK à chaque appel audio pour les styles fixes
+if ELEVENLABS_AVAILABLE:
+    _PRECOMPILED_SETTINGS = {
+        style: VoiceSettings(**{k: v for k, v in cfg.items() if k != 'description'})
+        for style, cfg in _NARRATIVE_STYLES.items()
+    }
+    _DEFAULT_PRECOMPILED = VoiceSettings(**_DEFAULT_AUDIO_SETTINGS)
+else:
+    _PRECOMPILED_SETTINGS = {}
+    _DEFAULT_PRECOMPILED = None
+
 
 class ElevenLabsClient(BaseTTSClient):
     def __init__(self):
@@ -27,15 +82,15 @@ class ElevenLabsClient(BaseTTSClient):
         self.voice_id = os.getenv('ELEVENLABS_VOICE_ID', 'JBFqnCBsd6RMkjVDRZzb')  # George par défaut
         
         if not self.api_key:
-            print("⚠️ ELEVENLABS_API_KEY non configurée")
+            logger.warning("⚠️ ELEVENLABS_API_KEY non configurée")
             self.client = None
             return
         
         try:
             self.client = ElevenLabs(api_key=self.api_key)
-            print(f"✅ ElevenLabs SDK v2.14.0 initialisé avec voice_id: {self.voice_id}")
+            logger.info("✅ ElevenLabs SDK v2.14.0 initialisé avec voice_id: %s", self.voice_id)
         except Exception as e:
-            print(f"❌ Erreur initialisation ElevenLabs: {e}")
+            logger.error("❌ Erreur initialisation ElevenLabs: %s", e)
             self.client = None
         
         self.voice_map = {}
@@ -65,28 +120,33 @@ class ElevenLabsClient(BaseTTSClient):
     def generate_audio(self, text: str, voice_settings: Optional[Dict] = None, voice_id: Optional[str] = None) -> bytes:
         """
         Génère un audio à partir d'un texte
-        
+
         Args:
             text: Texte à convertir en audio
-            voice_settings: Paramètres de voix personnalisés
-            
+            voice_settings: Paramètres de voix personnalisés (dict ou VoiceSettings déjà construit)
+
         Returns:
             bytes: Contenu audio en format MP3
         """
         if not self.client:
             raise Exception("Client ElevenLabs non initialisé")
-        
-        # Paramètres de voix par défaut pour NARRATION TOURISTIQUE
-        default_settings = {
-            "stability": 0.3,           # Plus bas = plus d'expression et variabilité
-            "similarity_boost": 0.9,    # Plus haut = garde le caractère de la voix  
-            "style": 0.7,               # Plus haut = plus d'émotion et enthousiasme
-            "use_speaker_boost": True   # Active l'amplification pour plus de clarté
-        }
-        
-        if voice_settings:
+
+        # Fast-path : réutiliser les VoiceSettings gelés quand aucun override
+        # n'est fourni (ou qu'un objet déjà construit est passé directement)
+        if voice_settings is None:
+            settings = _DEFAULT_PRECOMPILED
+        elif isinstance(voice_settings, VoiceSettings):
+            settings = voice_settings
+        else:
+            default_settings = dict(_DEFAULT_AUDIO_SETTINGS)
             default_settings.update(voice_settings)
-        
+            settings = VoiceSettings(
+                stability=default_settings["stability"],
+                similarity_boost=default_settings["similarity_boost"],
+                style=default_settings["style"],
+                use_speaker_boost=default_settings["use_speaker_boost"]
+            )
+
         try:
             # Utiliser le SDK officiel
             audio_generator = self.client.text_to_speech.convert(
@@ -94,18 +154,13 @@ class ElevenLabsClient(BaseTTSClient):
                 voice_id=voice_id or self.voice_id,
                 model_id="eleven_multilingual_v2",
                 output_format="mp3_44100_128",
-                voice_settings=VoiceSettings(
-                    stability=default_settings["stability"],
-                    similarity_boost=default_settings["similarity_boost"],
-                    style=default_settings["style"],
-                    use_speaker_boost=default_settings["use_speaker_boost"]
-                )
+                voice_settings=settings
             )
             
             # Convertir le générateur en bytes
             audio_data = b''.join(audio_generator)
             
-            print(f"✅ Audio généré avec SDK: {len(audio_data)} bytes")
+            logger.debug("✅ Audio généré avec SDK: %d bytes", len(audio_data))
             return audio_data
             
         except Exception as e:
@@ -170,7 +225,7 @@ class ElevenLabsClient(BaseTTSClient):
                     'available_for_tiers': getattr(voice, 'available_for_tiers', [])
                 })
             
-            print(f"✅ {len(voices_list)} voix disponibles")
+            logger.debug("✅ %d voix disponibles", len(voices_list))
             return voices_list
             
         except Exception as e:
@@ -250,21 +305,21 @@ class ElevenLabsClient(BaseTTSClient):
             bool: True si la connexion fonctionne
         """
         if not self.client:
-            print("❌ Client ElevenLabs non initialisé")
+            logger.error("❌ Client ElevenLabs non initialisé")
             return False
             
         try:
             voices = self.get_available_voices()
             user_info = self.get_user_info()
             
-            print(f"✅ ElevenLabs SDK connecté")
-            print(f"   Tier: {user_info.get('tier', 'N/A')}")
-            print(f"   Caractères utilisés: {user_info.get('character_count', 0)}/{user_info.get('character_limit', 'unlimited')}")
-            print(f"   Voix disponibles: {len(voices)}")
+            logger.info("✅ ElevenLabs SDK connecté")
+            logger.info("   Tier: %s", user_info.get('tier', 'N/A'))
+            logger.info("   Caractères utilisés: %s/%s", user_info.get('character_count', 0), user_info.get('character_limit', 'unlimited'))
+            logger.info("   Voix disponibles: %d", len(voices))
             return True
-            
+
         except Exception as e:
-            print(f"❌ Test connexion ElevenLabs failed: {e}")
+            logger.error("❌ Test connexion ElevenLabs failed: %s", e)
             return False
 
     def get_narrative_voice_settings(self, style: str = "enthusiastic") -> dict:
@@ -277,38 +332,7 @@ class ElevenLabsClient(BaseTTSClient):
         Returns:
             dict: Paramètres de voix optimisés
         """
-        styles = {
-            "enthusiastic": {
-                "stability": 0.2,           # Très expressif
-                "similarity_boost": 0.9,    # Garde l'identité de la voix
-                "style": 0.8,               # Très émotionnel et enthousiaste
-                "use_speaker_boost": True,
-                "description": "Parfait pour présenter des attractions avec passion"
-            },
-            "calm": {
-                "stability": 0.6,           # Plus stable et posé
-                "similarity_boost": 0.8,    
-                "style": 0.4,               # Moins d'émotion, plus informatif
-                "use_speaker_boost": True,
-                "description": "Idéal pour les instructions et informations pratiques"
-            },
-            "dramatic": {
-                "stability": 0.1,           # Très variable pour créer du suspense
-                "similarity_boost": 0.9,    
-                "style": 0.9,               # Maximum d'émotion
-                "use_speaker_boost": True,
-                "description": "Parfait pour les anecdotes historiques dramatiques"
-            },
-            "informative": {
-                "stability": 0.7,           # Très stable et clair
-                "similarity_boost": 0.7,    
-                "style": 0.3,               # Neutre et informatif
-                "use_speaker_boost": True,
-                "description": "Optimal pour les faits, horaires, prix"
-            }
-        }
-        
-        return styles.get(style, styles["enthusiastic"])
+        return _NARRATIVE_STYLES.get(style, _NARRATIVE_STYLES["enthusiastic"])
 
     def generate_tourist_guide_audio(
         self,
@@ -339,12 +363,13 @@ class ElevenLabsClient(BaseTTSClient):
         }
         
         style = content_to_style.get(content_type, "enthusiastic")
-        voice_settings = self.get_narrative_voice_settings(style)
-        
+        style_info = self.get_narrative_voice_settings(style)
+
         lang_display = language_label or "Langue inconnue"
-        print(f"🎭 Style narratif: {style} - {voice_settings['description']} ({lang_display})")
-        
-        return self.generate_audio(text, voice_settings, voice_id=voice_id)
+        logger.debug("🎭 Style narratif: %s - %s (%s)", style, style_info['description'], lang_display)
+
+        # Passer directement le VoiceSettings gelé (pas de re-validation SDK)
+        return self.generate_audio(text, _PRECOMPILED_SETTINGS[style], voice_id=voice_id)
 
     def estimate_cost(self, text: str) -> dict:
         """
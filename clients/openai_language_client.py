@@ -3,12 +3,41 @@ OpenAI Language Client
  - Batch translations
  - Marketing tour name generation
 """
+import asyncio
+import itertools
 import json
 import os
+import random
+import re
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:  # orjson optionnel : repli sur le module standard
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
 
 LANGUAGE_LABELS = {
     "en": "English",
@@ -19,6 +48,13 @@ LANGUAGE_LABELS = {
     "pt": "Portuguese (Portugal)"  # Force explicit EU Portuguese wording
 }
 
+# Extraction d'un tableau JSON noyé dans du texte libre (réponse bavarde)
+_ARR_RE = re.compile(r"\[.*\]", re.S)
+
+# Taille maximale d'un lot envoyé en un appel : au-delà, le lot est découpé
+# et les tranches partent en parallèle (évite aussi la troncature max_tokens)
+TRANSLATE_CHUNK_SIZE = 40
+
 LANGUAGE_VARIANT_HINTS = {
     "pt": (
         "When handling Portuguese outputs, always use the European Portuguese "
@@ -27,7 +63,110 @@ LANGUAGE_VARIANT_HINTS = {
 }
 
 
+class _LRUCache:
+    """Cache LRU minimal et thread-safe pour mémoïser les traductions."""
+
+    def __init__(self, maxsize: int = 50_000):
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self._maxsize = maxsize
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+
+class AsyncTranslationBatcher:
+    """
+    Regroupe des appels unitaires translate_one() en lots.
+
+    Les appels arrivant pendant la fenêtre de coalescence (5 ms par défaut)
+    ou jusqu'à max_batch_size sont fusionnés en un seul appel OpenAI par
+    langue cible ; chaque appelant récupère sa traduction via son Future.
+    """
+
+    def __init__(
+        self,
+        client: "OpenAILanguageClient",
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+    ):
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending: List[tuple] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def translate_one(
+        self,
+        text: str,
+        target_language: str,
+        source_language: Optional[str] = "en",
+    ) -> str:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+
+        async with self._lock:
+            self._pending.append((text, target_language, source_language, future))
+            if len(self._pending) >= self.max_batch_size:
+                batch, self._pending = self._pending, []
+                asyncio.ensure_future(self._process(batch))
+            elif self._flush_task is None:
+                self._flush_task = asyncio.ensure_future(self._delayed_flush())
+
+        return await future
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(self.max_wait)
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            self._flush_task = None
+        if batch:
+            await self._process(batch)
+
+    async def _process(self, batch: List[tuple]):
+        # Un appel OpenAI par langue cible, lancés en parallèle
+        groups: Dict[tuple, List[tuple]] = {}
+        for text, lang, src, future in batch:
+            groups.setdefault((lang, src), []).append((text, future))
+
+        await asyncio.gather(*[
+            self._process_group(lang, src, items)
+            for (lang, src), items in groups.items()
+        ])
+
+    async def _process_group(self, lang: str, src: Optional[str], items: List[tuple]):
+        texts = [text for text, _ in items]
+        try:
+            translations = await self.client.translate_batch_async(texts, lang, src)
+        except Exception as exc:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, future), translation in zip(items, translations):
+            if not future.done():
+                future.set_result(translation)
+
+
 class OpenAILanguageClient:
+    # Session partagée entre toutes les instances : même instancié
+    # par-requête (pattern courant côté API), le pool keep-alive survit
+    _SESSION: Optional[requests.Session] = None
+    _SESSION_LOCK = threading.Lock()
+
     def __init__(
         self,
         model: Optional[str] = None,
@@ -42,7 +181,37 @@ class OpenAILanguageClient:
         self.timeout = timeout
         self.max_retries = max_retries
         self.base_url = "https://api.openai.com/v1/chat/completions"
-        self.session = requests.Session()
+        self.session = self._get_session(max_retries)
+        # Clients async (HTTP/2 + keep-alive) liés à leur boucle d'événements :
+        # un AsyncClient créé dans __init__ garderait des connexions attachées
+        # à la première boucle et exploserait au deuxième asyncio.run()
+        self._async_clients: Dict["asyncio.AbstractEventLoop", httpx.AsyncClient] = {}
+        # Mémoïsation par chaîne : les noms de tours/POI se répètent beaucoup
+        # d'une ville à l'autre, inutile de les re-traduire à chaque lot
+        self._tx_cache = _LRUCache()
+
+    @classmethod
+    def _get_session(cls, max_retries: int = 3) -> requests.Session:
+        if cls._SESSION is None:
+            with cls._SESSION_LOCK:
+                if cls._SESSION is None:
+                    session = requests.Session()
+                    # Pool keep-alive dimensionné + retries délégués à urllib3
+                    # (pas de boucle Python bloquante pour les 429/5xx,
+                    # Retry-After respecté)
+                    retry = Retry(
+                        total=max_retries,
+                        backoff_factor=0.5,
+                        status_forcelist=(429, 500, 502, 503, 504),
+                        allowed_methods=frozenset(["POST"]),
+                        respect_retry_after_header=True,
+                    )
+                    adapter = HTTPAdapter(
+                        pool_connections=4, pool_maxsize=32, max_retries=retry
+                    )
+                    session.mount("https://", adapter)
+                    cls._SESSION = session
+        return cls._SESSION
 
     # --------------------------------------------------------------------- #
     # Public API
@@ -59,66 +228,111 @@ class OpenAILanguageClient:
         if not texts:
             return []
 
-        target_label = LANGUAGE_LABELS.get(target_language, target_language)
-        source_label = LANGUAGE_LABELS.get(source_language, source_language) if source_language else None
-
-        numbered_items = [
-            {"index": idx, "text": text or ""}
-            for idx, text in enumerate(texts)
-        ]
-
-        system_prompt = (
-            "You are a professional translator. "
-            "Each input string is the name of a tourist place or guided tour. "
-            "Preserve the local/marketing tone and return only valid JSON."
+        results, miss_indices = self._lookup_translation_cache(
+            texts, target_language, source_language
         )
-        variant_hint = LANGUAGE_VARIANT_HINTS.get(target_language.lower())
-        if variant_hint:
-            system_prompt += " " + variant_hint
+        if not miss_indices:
+            return results
 
-        if source_label:
-            user_intro = (
-                f"Translate the following names from {source_label} to {target_label}. "
-                "Each name represents a tourist attraction or a guided tour. "
-                "Keep the cultural meaning and do not add extra text.\n"
-                "Respond ONLY with a JSON array of strings in the same order "
-                "as the inputs.\n\n"
+        miss_texts = [texts[i] for i in miss_indices]
+        # Chaque nom unique n'est envoyé (et facturé) qu'une seule fois
+        unique_misses = list(dict.fromkeys(miss_texts))
+
+        chunks = self._split_chunks(unique_misses)
+        if len(chunks) == 1:
+            unique_translated = self._translate_chunk(
+                chunks[0], target_language, source_language
             )
         else:
-            user_intro = (
-                "The texts below may be in different languages. "
-                f"Translate them into {target_label}. "
-                "Each name represents a tourist attraction or guided tour. "
-                "Keep the cultural meaning and do not add extra text.\n"
-                "Respond ONLY with a JSON array of strings in the same order "
-                "as the inputs.\n\n"
-            )
+            with ThreadPoolExecutor(max_workers=min(8, len(chunks))) as executor:
+                unique_translated = list(itertools.chain.from_iterable(
+                    executor.map(
+                        lambda chunk: self._translate_chunk(
+                            chunk, target_language, source_language
+                        ),
+                        chunks,
+                    )
+                ))
+
+        mapping = dict(zip(unique_misses, unique_translated))
+        translated = [mapping[t] for t in miss_texts]
+        return self._merge_translations(
+            results, miss_indices, miss_texts, translated,
+            target_language, source_language,
+        )
 
-        user_prompt = user_intro + f"{json.dumps(numbered_items, ensure_ascii=False, indent=2)}"
+    async def translate_batch_async(
+        self,
+        texts: List[str],
+        target_language: str,
+        source_language: Optional[str] = "en",
+    ) -> List[str]:
+        """
+        Variante asynchrone de translate_batch (même prompt, même parsing).
+        """
+        if not texts:
+            return []
 
-        content = self._chat_completion(
-            system_prompt,
-            user_prompt,
-            temperature=0.2,
-            max_tokens=600,
+        results, miss_indices = self._lookup_translation_cache(
+            texts, target_language, source_language
+        )
+        if not miss_indices:
+            return results
+
+        miss_texts = [texts[i] for i in miss_indices]
+        # Chaque nom unique n'est envoyé (et facturé) qu'une seule fois
+        unique_misses = list(dict.fromkeys(miss_texts))
+
+        chunks = self._split_chunks(unique_misses)
+        chunk_results = await asyncio.gather(*[
+            self._translate_chunk_async(chunk, target_language, source_language)
+            for chunk in chunks
+        ])
+        unique_translated = list(itertools.chain.from_iterable(chunk_results))
+
+        mapping = dict(zip(unique_misses, unique_translated))
+        translated = [mapping[t] for t in miss_texts]
+        return self._merge_translations(
+            results, miss_indices, miss_texts, translated,
+            target_language, source_language,
         )
 
-        translations = self._parse_json_array(content, expected_len=len(texts))
-        if translations is None:
-            raise RuntimeError(
-                f"Traduction OpenAI échouée (langue cible={target_label}) – "
-                "réponse vide ou invalide."
-            )
+    async def translate_batch_many(
+        self,
+        texts: List[str],
+        target_languages: List[str],
+        source_language: Optional[str] = "en",
+    ) -> Dict[str, List[str]]:
+        """
+        Traduit le même lot de textes vers plusieurs langues en parallèle.
+        Les N allers-retours OpenAI se recouvrent sur le réseau : le temps
+        total passe de sum(RTT) à ~max(RTT).
+        """
+        results = await asyncio.gather(*[
+            self.translate_batch_async(texts, lang, source_language)
+            for lang in target_languages
+        ])
+        return dict(zip(target_languages, results))
 
-        # S'assurer que la taille correspond
-        if len(translations) != len(texts):
-            raise RuntimeError(
-                f"Traduction OpenAI incomplète (attendu {len(texts)} éléments, "
-                f"reçu {len(translations)} pour langue cible={target_label})."
-            )
+    def translate_batch_many_sync(
+        self,
+        texts: List[str],
+        target_languages: List[str],
+        source_language: Optional[str] = "en",
+    ) -> Dict[str, List[str]]:
+        """
+        Wrapper synchrone de translate_batch_many pour les appelants bloquants.
+        Le client async de la boucle éphémère est fermé avant la fin du run.
+        """
+        async def _run() -> Dict[str, List[str]]:
+            try:
+                return await self.translate_batch_many(
+                    texts, target_languages, source_language
+                )
+            finally:
+                await self.aclose()
 
-        return [t.strip() if isinstance(t, str) else original
-                for t, original in zip(translations, texts)]
+        return asyncio.run(_run())
 
     def generate_tour_name(
         self,
@@ -145,7 +359,7 @@ class OpenAILanguageClient:
         )
         user_prompt = (
             f"City: {city}, Country: {country}\n"
-            f"Points of interest:\n{json.dumps(points_preview, ensure_ascii=False, indent=2)}\n\n"
+            f"Points of interest:\n{_json_dumps(points_preview)}\n\n"
             "Create ONE original, concise tour name. Output MUST be in ENGLISH only.\n\n"
             "Requirements:\n"
             "- 1–3 words, ≤25 characters, Title Case\n"
@@ -166,6 +380,78 @@ class OpenAILanguageClient:
             max_tokens=32,
         )
 
+        return self._normalize_tour_name(content)
+
+    def generate_tour_names(
+        self,
+        tours: List[Dict],
+    ) -> Dict[str, Optional[str]]:
+        """
+        Génère les noms marketing de plusieurs tours en UN SEUL appel OpenAI.
+
+        Chaque entrée de `tours` doit contenir id, city, country et points ;
+        retourne {id: nom} (None pour les tours sans réponse exploitable).
+        Le prompt système n'est payé qu'une fois au lieu de N.
+        """
+        if not tours:
+            return {}
+
+        # Un seul tour : le chemin unitaire existant suffit
+        if len(tours) == 1:
+            tour = tours[0]
+            name = self.generate_tour_name(
+                tour.get("city", ""), tour.get("country", ""), tour.get("points", [])
+            )
+            return {tour.get("id"): name}
+
+        previews = [
+            {
+                "id": tour.get("id"),
+                "city": tour.get("city", ""),
+                "country": tour.get("country", ""),
+                "points": [
+                    {"name": p.get("name", ""), "types": p.get("types", [])}
+                    for p in tour.get("points", [])[:12]
+                ],
+            }
+            for tour in tours
+        ]
+
+        system_prompt = (
+            "You are a concise travel copywriter. For EACH tour in the input, return a short, "
+            "clear tour name in English and in Title Case (1–3 words, ≤25 characters). Avoid "
+            "marketing fluff and overused words such as Odyssey, Journey, Trail, Trek, Quest, "
+            "Gems, Treasures, Secrets, Heritage, Epic, Ultimate, Adventure. Aim for descriptive, "
+            "grounded names. Respond ONLY with valid JSON."
+        )
+        user_prompt = (
+            f"Tours:\n{_json_dumps(previews)}\n\n"
+            "Create ONE original, concise name per tour. Output MUST be in ENGLISH only.\n\n"
+            "Requirements:\n"
+            "- 1–3 words, ≤25 characters, Title Case\n"
+            "- Plain, descriptive, not grandiose; avoid Odyssey/Journey/Trail/Trek/Quest/etc.\n"
+            "- All names must be distinct\n\n"
+            'Respond ONLY with a JSON object: {"names": {"<id>": "Name", ...}}'
+        )
+
+        content = self._chat_completion(
+            system_prompt,
+            user_prompt,
+            temperature=0.6,
+            max_tokens=32 * len(tours),
+        )
+
+        parsed = self._parse_json_object(content)
+        names = parsed.get("names", {}) if isinstance(parsed, dict) else {}
+
+        return {
+            tour.get("id"): self._normalize_tour_name(names.get(str(tour.get("id")))
+                                                      or names.get(tour.get("id")))
+            for tour in tours
+        }
+
+    @staticmethod
+    def _normalize_tour_name(content: Optional[str]) -> Optional[str]:
         if not content:
             return None
 
@@ -184,6 +470,170 @@ class OpenAILanguageClient:
     # --------------------------------------------------------------------- #
     # Helpers
     # --------------------------------------------------------------------- #
+    @staticmethod
+    def _split_chunks(texts: List[str]) -> List[List[str]]:
+        return [
+            texts[i:i + TRANSLATE_CHUNK_SIZE]
+            for i in range(0, len(texts), TRANSLATE_CHUNK_SIZE)
+        ] or [[]]
+
+    def _translate_chunk(
+        self,
+        chunk: List[str],
+        target_language: str,
+        source_language: Optional[str],
+    ) -> List[str]:
+        system_prompt, user_prompt = self._build_translation_prompts(
+            chunk, target_language, source_language
+        )
+        content = self._chat_completion(
+            system_prompt,
+            user_prompt,
+            temperature=0.2,
+            # Budget proportionnel à la tranche : plus de troncature silencieuse
+            max_tokens=min(4000, 40 * len(chunk)),
+        )
+        return self._finalize_translations(content, chunk, target_language)
+
+    async def _translate_chunk_async(
+        self,
+        chunk: List[str],
+        target_language: str,
+        source_language: Optional[str],
+    ) -> List[str]:
+        system_prompt, user_prompt = self._build_translation_prompts(
+            chunk, target_language, source_language
+        )
+        content = await self._chat_completion_async(
+            system_prompt,
+            user_prompt,
+            temperature=0.2,
+            max_tokens=min(4000, 40 * len(chunk)),
+        )
+        return self._finalize_translations(content, chunk, target_language)
+
+    @staticmethod
+    def _norm(text: str) -> str:
+        """
+        Clé de cache normalisée : casse, espaces multiples et espaces de
+        bord ne doivent pas provoquer de re-traduction d'un même nom.
+        """
+        return " ".join(text.strip().lower().split())
+
+    def _lookup_translation_cache(
+        self,
+        texts: List[str],
+        target_language: str,
+        source_language: Optional[str],
+    ) -> tuple:
+        """
+        Sépare les textes en hits (déjà traduits) et misses à envoyer à l'API.
+        Retourne (résultats partiels, indices manquants).
+        """
+        results: List[Optional[str]] = [None] * len(texts)
+        miss_indices: List[int] = []
+        for idx, text in enumerate(texts):
+            cached = self._tx_cache.get(
+                (source_language, target_language, self._norm(text or ""))
+            )
+            if cached is None:
+                miss_indices.append(idx)
+            else:
+                # Réaligne la majuscule initiale sur le texte d'origine
+                if text and cached and text[0].isupper() and cached[0].islower():
+                    cached = cached[0].upper() + cached[1:]
+                results[idx] = cached
+        return results, miss_indices
+
+    def _merge_translations(
+        self,
+        results: List[Optional[str]],
+        miss_indices: List[int],
+        miss_texts: List[str],
+        translated: List[str],
+        target_language: str,
+        source_language: Optional[str],
+    ) -> List[str]:
+        """
+        Réinjecte les traductions fraîches dans l'ordre d'origine et
+        alimente le cache pour les prochains lots.
+        """
+        for idx, text, translation in zip(miss_indices, miss_texts, translated):
+            results[idx] = translation
+            self._tx_cache.put(
+                (source_language, target_language, self._norm(text or "")),
+                translation,
+            )
+        return results
+
+    def _build_translation_prompts(
+        self,
+        texts: List[str],
+        target_language: str,
+        source_language: Optional[str],
+    ) -> tuple:
+        target_label = LANGUAGE_LABELS.get(target_language, target_language)
+        source_label = LANGUAGE_LABELS.get(source_language, source_language) if source_language else None
+
+        # Un tableau JSON préserve déjà l'ordre : inutile d'envelopper chaque
+        # texte dans {"index", "text"}, ça doublait la taille du prompt
+        payload = [text or "" for text in texts]
+
+        system_prompt = (
+            "You are a professional translator. "
+            "Each input string is the name of a tourist place or guided tour. "
+            "Preserve the local/marketing tone and return only valid JSON."
+        )
+        variant_hint = LANGUAGE_VARIANT_HINTS.get(target_language.lower())
+        if variant_hint:
+            system_prompt += " " + variant_hint
+
+        if source_label:
+            user_intro = (
+                f"Translate the following names from {source_label} to {target_label}. "
+                "Each name represents a tourist attraction or a guided tour. "
+                "Keep the cultural meaning and do not add extra text.\n"
+                "Input is a JSON array; respond ONLY with a JSON array of "
+                "strings of the same length, in the same order.\n\n"
+            )
+        else:
+            user_intro = (
+                "The texts below may be in different languages. "
+                f"Translate them into {target_label}. "
+                "Each name represents a tourist attraction or guided tour. "
+                "Keep the cultural meaning and do not add extra text.\n"
+                "Input is a JSON array; respond ONLY with a JSON array of "
+                "strings of the same length, in the same order.\n\n"
+            )
+
+        user_prompt = user_intro + _json_dumps(payload)
+        return system_prompt, user_prompt
+
+    def _finalize_translations(
+        self,
+        content: str,
+        texts: List[str],
+        target_language: str,
+    ) -> List[str]:
+        target_label = LANGUAGE_LABELS.get(target_language, target_language)
+
+        translations = self._parse_json_array(content, expected_len=len(texts))
+        if translations is None:
+            raise RuntimeError(
+                f"Traduction OpenAI échouée (langue cible={target_label}) – "
+                "réponse vide ou invalide."
+            )
+
+        # S'assurer que la taille correspond
+        if len(translations) != len(texts):
+            raise RuntimeError(
+                f"Traduction OpenAI incomplète (attendu {len(texts)} éléments, "
+                f"reçu {len(translations)} pour langue cible={target_label})."
+            )
+
+        return [t.strip() if isinstance(t, str) else original
+                for t, original in zip(translations, texts)]
+
     def _chat_completion(
         self,
         system_prompt: str,
@@ -205,55 +655,171 @@ class OpenAILanguageClient:
             "Content-Type": "application/json",
         }
 
+        # Les 429/5xx sont rejoués par l'adapter urllib3 ; il ne reste à
+        # gérer ici que les erreurs réseau (connexion, timeout)
+        try:
+            response = self.session.post(
+                self.base_url,
+                headers=headers,
+                json=payload,
+                timeout=self.timeout,
+                stream=True,
+            )
+        except requests.RequestException as exc:
+            logger.warning("⚠️ Exception OpenAI: %s", exc)
+            return ""
+
+        if response.status_code == 200:
+            # Lecture incrémentale : le parse démarre dès la fin de la
+            # réception sans matérialiser le corps en str intermédiaire
+            buffer = bytearray()
+            try:
+                for chunk in response.iter_content(chunk_size=8192):
+                    buffer += chunk
+            except requests.RequestException as exc:
+                logger.warning("⚠️ Réponse OpenAI tronquée: %s", exc)
+                return ""
+            data = _json_loads(bytes(buffer))
+            choices = data.get("choices", [])
+            if choices:
+                return choices[0]["message"]["content"]
+            return ""
+
+        logger.error("❌ Erreur OpenAI %s: %s", response.status_code, response.text)
+        return ""
+
+    async def _chat_completion_async(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> str:
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+        async_client = self._get_async_client()
+
         for attempt in range(self.max_retries):
             try:
-                response = self.session.post(
+                response = await async_client.post(
                     self.base_url,
                     headers=headers,
                     json=payload,
-                    timeout=self.timeout,
                 )
                 if response.status_code == 200:
-                    data = response.json()
+                    data = _json_loads(response.content)
                     choices = data.get("choices", [])
                     if choices:
                         return choices[0]["message"]["content"]
                     return ""
 
-                if response.status_code in (429, 500, 503):
-                    wait_time = 2 ** attempt
-                    print(f"⏳ OpenAI rate limit/erreur ({response.status_code}), "
-                          f"attente {wait_time}s...")
-                    time.sleep(wait_time)
+                if response.status_code in (429, 500, 502, 503, 504):
+                    wait_time = self._backoff(attempt, response)
+                    logger.warning("⏳ OpenAI rate limit/erreur (%s), attente %.1fs...",
+                                   response.status_code, wait_time)
+                    await asyncio.sleep(wait_time)
                     continue
 
-                print(f"❌ Erreur OpenAI {response.status_code}: {response.text}")
+                logger.error("❌ Erreur OpenAI %s: %s", response.status_code, response.text)
                 break
 
-            except requests.RequestException as exc:
-                wait_time = 2 ** attempt
-                print(f"⚠️ Exception OpenAI: {exc} (tentative {attempt+1}), "
-                      f"attente {wait_time}s")
-                time.sleep(wait_time)
+            except httpx.HTTPError as exc:
+                wait_time = self._backoff(attempt)
+                logger.warning("⚠️ Exception OpenAI: %s (tentative %d), attente %.1fs",
+                               exc, attempt + 1, wait_time)
+                await asyncio.sleep(wait_time)
 
         return ""
 
     @staticmethod
-    def _parse_json_array(content: str, expected_len: int) -> Optional[List[str]]:
+    def _backoff(attempt: int, response=None) -> float:
+        """
+        Délai avant retry : Retry-After du serveur si présent, sinon
+        exponentiel plafonné avec jitter (évite les retries en troupeau
+        quand plusieurs workers tapent la limite en même temps).
+        """
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return float(retry_after)
+                except ValueError:
+                    pass
+        return min(30.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """
+        Retourne le client async de la boucle courante (créé à la demande).
+        """
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None or client.is_closed:
+            # Purger les entrées des boucles terminées au passage
+            self._async_clients = {
+                l: c for l, c in self._async_clients.items()
+                if not c.is_closed and not l.is_closed()
+            }
+            client = httpx.AsyncClient(
+                http2=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_keepalive_connections=20),
+            )
+            self._async_clients[loop] = client
+        return client
+
+    async def aclose(self):
+        """Ferme le client HTTP asynchrone lié à la boucle courante."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+    @staticmethod
+    def _parse_json_object(content: str) -> Optional[Dict]:
         if not content:
             return None
 
         try:
-            return json.loads(content)
-        except json.JSONDecodeError:
+            return _json_loads(content)
+        except ValueError:
             pass
 
-        start = content.find("[")
-        end = content.rfind("]")
+        start = content.find("{")
+        end = content.rfind("}")
         if start != -1 and end != -1:
             try:
-                return json.loads(content[start:end + 1])
-            except json.JSONDecodeError:
+                return _json_loads(content[start:end + 1])
+            except ValueError:
+                return None
+
+        return None
+
+    @staticmethod
+    def _parse_json_array(content: str, expected_len: int) -> Optional[List[str]]:
+        if not content:
+            return None
+
+        try:
+            return _json_loads(content)
+        except ValueError:
+            pass
+
+        match = _ARR_RE.search(content)
+        if match:
+            try:
+                return _json_loads(match.group())
+            except ValueError:
                 return None
 
         return None
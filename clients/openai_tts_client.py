@@ -2,9 +2,15 @@
 Client OpenAI Text-to-Speech
 Compatible avec l'interface ElevenLabsClient pour remplacement transparent
 """
+import hashlib
 import os
+import re
 import sys
-from typing import Dict, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
 # Ajouter le répertoire parent au path pour imports
@@ -12,16 +18,122 @@ if __name__ == "__main__":
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from clients.base_tts_client import BaseTTSClient
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 try:
     from openai import OpenAI
     OPENAI_AVAILABLE = True
 except ImportError:
-    print("⚠️ OpenAI SDK non installé. Exécutez: pip install openai")
+    logger.warning("⚠️ OpenAI SDK non installé. Exécutez: pip install openai")
     OPENAI_AVAILABLE = False
 
 load_dotenv()
 
+# Répertoire du cache audio local : la synthèse est déterministe pour un
+# triplet (modèle, voix, texte), inutile de re-payer l'API sur les re-runs
+TTS_CACHE_DIR = os.getenv('OPENAI_TTS_CACHE_DIR', os.path.join('.cache', 'tts'))
+
+# Seuil au-delà duquel un texte est découpé en phrases et synthétisé en
+# parallèle (les flux MP3 se concatènent proprement trame par trame)
+TTS_PARALLEL_THRESHOLD = 600
+
+
+# OpenAI TTS a un ensemble fixe de voix : table construite une fois à
+# l'import, avec index par voice_id pour les lookups O(1)
+_AVAILABLE_VOICES = [
+    {
+        'voice_id': 'alloy',
+        'name': 'Alloy',
+        'category': 'standard',
+        'description': 'Voix neutre et équilibrée',
+        'preview_url': '',
+        'available_for_tiers': ['free', 'paid']
+    },
+    {
+        'voice_id': 'echo',
+        'name': 'Echo',
+        'category': 'standard',
+        'description': 'Voix masculine claire',
+        'preview_url': '',
+        'available_for_tiers': ['free', 'paid']
+    },
+    {
+        'voice_id': 'fable',
+        'name': 'Fable',
+        'category': 'standard',
+        'description': 'Voix britannique expressive',
+        'preview_url': '',
+        'available_for_tiers': ['free', 'paid']
+    },
+    {
+        'voice_id': 'onyx',
+        'name': 'Onyx',
+        'category': 'standard',
+        'description': 'Voix masculine profonde',
+        'preview_url': '',
+        'available_for_tiers': ['free', 'paid']
+    },
+    {
+        'voice_id': 'nova',
+        'name': 'Nova',
+        'category': 'standard',
+        'description': 'Voix féminine enthousiaste (recommandée pour guides touristiques)',
+        'preview_url': '',
+        'available_for_tiers': ['free', 'paid']
+    },
+    {
+        'voice_id': 'shimmer',
+        'name': 'Shimmer',
+        'category': 'standard',
+        'description': 'Voix féminine chaleureuse',
+        'preview_url': '',
+        'available_for_tiers': ['free', 'paid']
+    }
+]
+
+_VOICE_INFO_BY_ID = {voice['voice_id']: voice for voice in _AVAILABLE_VOICES}
+
+
+def _parse_env_voice_map() -> Dict[str, str]:
+    voice_map = {}
+    for entry in os.getenv('OPENAI_VOICE_MAP', '').split(','):
+        if '=' in entry:
+            lang, voice = entry.split('=', 1)
+            lang = lang.strip().lower()
+            voice = voice.strip()
+            if lang and voice:
+                voice_map[lang] = voice
+    return voice_map
+
+
+# Mapping langue -> voix figé à l'import : OPENAI_VOICE_MAP n'est parsé
+# qu'une fois, plus de reconstruction à chaque instanciation du client
+VOICE_MAP = MappingProxyType(_parse_env_voice_map() or {
+    'en': 'nova',  # Féminine enthousiaste pour anglais
+    'fr': 'nova',  # Multilingue compatible français
+    'es': 'nova',  # Multilingue compatible espagnol
+    'it': 'nova',  # Multilingue compatible italien
+    'de': 'nova',  # Multilingue compatible allemand
+    'pt': 'nova',  # Multilingue compatible portugais
+})
+
+
+@lru_cache(maxsize=64)
+def _resolve_voice(default_voice: str, language_code: str) -> str:
+    lang = language_code.lower()
+    if lang in VOICE_MAP:
+        return VOICE_MAP[lang]
+
+    # Gestion des codes langue avec région (ex: en-US -> en)
+    if '-' in lang:
+        base = lang.split('-')[0]
+        if base in VOICE_MAP:
+            return VOICE_MAP[base]
+
+    return default_voice
+
 
 class OpenAITTSClient(BaseTTSClient):
     """
@@ -36,6 +148,11 @@ class OpenAITTSClient(BaseTTSClient):
     - shimmer: Voix féminine chaleureuse
     """
 
+    # Client SDK partagé : l'objet OpenAI gère son propre pool HTTP, le
+    # recréer par instance jetait les connexions keep-alive
+    _SDK_CLIENT = None
+    _SDK_CLIENT_LOCK = threading.Lock()
+
     def __init__(self):
         """Initialise le client OpenAI TTS"""
         if not OPENAI_AVAILABLE:
@@ -44,40 +161,40 @@ class OpenAITTSClient(BaseTTSClient):
         self.api_key = os.getenv('OPENAI_API_KEY')
 
         if not self.api_key:
-            print("⚠️ OPENAI_API_KEY non configurée")
+            logger.warning("⚠️ OPENAI_API_KEY non configurée")
             self.client = None
             return
 
         try:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = self._get_sdk_client(self.api_key)
             # Voix par défaut optimale pour narration touristique
             self.voice_id = os.getenv('OPENAI_VOICE', 'nova')
-            print(f"✅ OpenAI TTS initialisé avec voix: {self.voice_id}")
+            # tts-1 par défaut : 2x moins cher et plus rapide que tts-1-hd,
+            # indiscernable pour de la narration de fond (HD en opt-in)
+            self.model = os.getenv('OPENAI_TTS_MODEL', 'tts-1')
+            logger.info("✅ OpenAI TTS initialisé avec voix: %s (modèle: %s)", self.voice_id, self.model)
         except Exception as e:
-            print(f"❌ Erreur initialisation OpenAI TTS: {e}")
+            logger.error("❌ Erreur initialisation OpenAI TTS: %s", e)
             self.client = None
 
-        # Mapping des langues vers les voix optimales
-        self.voice_map = {}
-        voice_map_env = os.getenv('OPENAI_VOICE_MAP', '')
-        for entry in voice_map_env.split(','):
-            if '=' in entry:
-                lang, voice = entry.split('=', 1)
-                lang = lang.strip().lower()
-                voice = voice.strip()
-                if lang and voice:
-                    self.voice_map[lang] = voice
-
-        # Configuration par défaut si aucune configuration spécifique
-        if not self.voice_map:
-            self.voice_map = {
-                'en': 'nova',  # Féminine enthousiaste pour anglais
-                'fr': 'nova',  # Multilingue compatible français
-                'es': 'nova',  # Multilingue compatible espagnol
-                'it': 'nova',  # Multilingue compatible italien
-                'de': 'nova',  # Multilingue compatible allemand
-                'pt': 'nova',  # Multilingue compatible portugais
-            }
+        # Mapping des langues vers les voix optimales (figé à l'import)
+        self.voice_map = VOICE_MAP
+
+        # Cache disque des audios générés (clé = hash modèle|voix|texte)
+        self._tts_cache_dir = TTS_CACHE_DIR
+        try:
+            os.makedirs(self._tts_cache_dir, exist_ok=True)
+        except OSError as e:
+            logger.warning("⚠️ Cache TTS indisponible (%s), génération sans cache", e)
+            self._tts_cache_dir = None
+
+    @classmethod
+    def _get_sdk_client(cls, api_key: str):
+        if cls._SDK_CLIENT is None:
+            with cls._SDK_CLIENT_LOCK:
+                if cls._SDK_CLIENT is None:
+                    cls._SDK_CLIENT = OpenAI(api_key=api_key)
+        return cls._SDK_CLIENT
 
     def get_voice_id(self, language_code: str) -> str:
         """
@@ -92,23 +209,14 @@ class OpenAITTSClient(BaseTTSClient):
         if not language_code:
             return self.voice_id
 
-        lang = language_code.lower()
-        if lang in self.voice_map:
-            return self.voice_map[lang]
-
-        # Gestion des codes langue avec région (ex: en-US -> en)
-        if '-' in lang:
-            base = lang.split('-')[0]
-            if base in self.voice_map:
-                return self.voice_map[base]
-
-        return self.voice_id
+        return _resolve_voice(self.voice_id, language_code)
 
     def generate_audio(
         self,
         text: str,
         voice_settings: Optional[Dict] = None,
-        voice_id: Optional[str] = None
+        voice_id: Optional[str] = None,
+        model: Optional[str] = None
     ) -> bytes:
         """
         Génère un audio à partir d'un texte
@@ -117,6 +225,7 @@ class OpenAITTSClient(BaseTTSClient):
             text: Texte à convertir en audio
             voice_settings: Paramètres de voix (ignorés pour OpenAI - compatibilité API)
             voice_id: ID de la voix à utiliser (alloy, echo, fable, onyx, nova, shimmer)
+            model: Modèle TTS à utiliser (défaut self.model ; 'tts-1-hd' pour l'export final)
 
         Returns:
             bytes: Contenu audio en format MP3
@@ -133,40 +242,111 @@ class OpenAITTSClient(BaseTTSClient):
             # Valider la voix
             valid_voices = ['alloy', 'echo', 'fable', 'onyx', 'nova', 'shimmer']
             if target_voice not in valid_voices:
-                print(f"⚠️ Voix {target_voice} invalide, utilisation de nova par défaut")
+                logger.warning("⚠️ Voix %s invalide, utilisation de nova par défaut", target_voice)
                 target_voice = 'nova'
 
-            # Générer l'audio avec OpenAI TTS
-            # Modèle tts-1-hd pour qualité optimale (tts-1 pour vitesse)
-            response = self.client.audio.speech.create(
-                model="tts-1-hd",  # Haute qualité
-                voice=target_voice,
-                input=text,
-                response_format="mp3",
-                speed=1.0  # Vitesse normale
-            )
-
-            # Convertir la réponse en bytes
-            audio_data = response.content
-
-            print(f"✅ Audio généré avec OpenAI TTS: {len(audio_data)} bytes (voix: {target_voice})")
+            target_model = model or self.model
+            cache_key = self._cache_key(target_model, target_voice, text)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                logger.debug("✅ Audio servi depuis le cache TTS: %d bytes (voix: %s)", len(cached), target_voice)
+                return cached
+
+            if len(text) > TTS_PARALLEL_THRESHOLD:
+                # Longue narration : synthèse par groupes de phrases en
+                # parallèle puis concaténation des trames MP3 dans l'ordre
+                chunks = self._split_sentences(text)
+                with ThreadPoolExecutor(max_workers=4) as executor:
+                    parts = list(executor.map(
+                        lambda chunk: self._synthesize(chunk, target_voice, target_model),
+                        chunks,
+                    ))
+                audio_data = b"".join(parts)
+            else:
+                audio_data = self._synthesize(text, target_voice, target_model)
+
+            self._cache_put(cache_key, audio_data)
+
+            logger.debug("✅ Audio généré avec OpenAI TTS: %d bytes (voix: %s)", len(audio_data), target_voice)
             return audio_data
 
         except Exception as e:
             raise Exception(f"Erreur génération audio OpenAI TTS: {str(e)}")
 
+    def _synthesize(self, text: str, voice: str, model: str) -> bytes:
+        """Appel API unitaire (vitesse normale)."""
+        response = self.client.audio.speech.create(
+            model=model,
+            voice=voice,
+            input=text,
+            response_format="mp3",
+            speed=1.0
+        )
+        return response.content
+
+    @staticmethod
+    def _split_sentences(text: str, max_chars: int = 400) -> List[str]:
+        """
+        Découpe un texte en groupes de phrases d'au plus max_chars,
+        en respectant la ponctuation de fin de phrase.
+        """
+        sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+        chunks: List[str] = []
+        current = ""
+        for sentence in sentences:
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}".strip()
+        if current:
+            chunks.append(current)
+        return chunks or [text]
+
+    # ------------------------------------------------------------------ #
+    # Cache disque
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _cache_key(model: str, voice: str, text: str) -> str:
+        return hashlib.blake2b(
+            f"{model}|{voice}|{text}".encode(), digest_size=16
+        ).hexdigest()
+
+    def _cache_get(self, cache_key: str) -> Optional[bytes]:
+        if not self._tts_cache_dir:
+            return None
+        path = os.path.join(self._tts_cache_dir, f"{cache_key}.mp3")
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            return None
+
+    def _cache_put(self, cache_key: str, audio_data: bytes):
+        if not self._tts_cache_dir:
+            return
+        path = os.path.join(self._tts_cache_dir, f"{cache_key}.mp3")
+        try:
+            with open(path, 'wb') as f:
+                f.write(audio_data)
+        except OSError as e:
+            logger.warning("⚠️ Écriture cache TTS échouée: %s", e)
+
     def generate_audio_stream(
         self,
         text: str,
         voice_settings: Optional[Dict] = None,
-        voice_id: Optional[str] = None
+        voice_id: Optional[str] = None,
+        model: Optional[str] = None
     ):
         """
         Génère un stream audio (pour le streaming en temps réel)
 
-        Note: OpenAI TTS ne supporte pas nativement le streaming dans la même API
-        Cette méthode génère l'audio complet puis le retourne comme générateur
-        pour maintenir la compatibilité API
+        Les octets sont relayés au fil de la réponse HTTP : le premier chunk
+        part dès le premier paquet reçu, sans bufferiser le MP3 complet en
+        mémoire.
 
         Args:
             text: Texte à convertir
@@ -180,13 +360,20 @@ class OpenAITTSClient(BaseTTSClient):
             raise Exception("Client OpenAI TTS non initialisé")
 
         try:
-            # Générer l'audio complet
-            audio_data = self.generate_audio(text, voice_settings, voice_id)
+            target_voice = voice_id or self.voice_id
+            valid_voices = ['alloy', 'echo', 'fable', 'onyx', 'nova', 'shimmer']
+            if target_voice not in valid_voices:
+                logger.warning("⚠️ Voix %s invalide, utilisation de nova par défaut", target_voice)
+                target_voice = 'nova'
 
-            # Simuler un stream en retournant par chunks
-            chunk_size = 4096
-            for i in range(0, len(audio_data), chunk_size):
-                yield audio_data[i:i + chunk_size]
+            with self.client.audio.speech.with_streaming_response.create(
+                model=model or self.model,
+                voice=target_voice,
+                input=text,
+                response_format="mp3",
+                speed=1.0
+            ) as response:
+                yield from response.iter_bytes(chunk_size=4096)
 
         except Exception as e:
             raise Exception(f"Erreur stream audio OpenAI: {str(e)}")
@@ -198,57 +385,7 @@ class OpenAITTSClient(BaseTTSClient):
         Returns:
             list: Liste des voix disponibles OpenAI
         """
-        # OpenAI TTS a un ensemble fixe de voix
-        return [
-            {
-                'voice_id': 'alloy',
-                'name': 'Alloy',
-                'category': 'standard',
-                'description': 'Voix neutre et équilibrée',
-                'preview_url': '',
-                'available_for_tiers': ['free', 'paid']
-            },
-            {
-                'voice_id': 'echo',
-                'name': 'Echo',
-                'category': 'standard',
-                'description': 'Voix masculine claire',
-                'preview_url': '',
-                'available_for_tiers': ['free', 'paid']
-            },
-            {
-                'voice_id': 'fable',
-                'name': 'Fable',
-                'category': 'standard',
-                'description': 'Voix britannique expressive',
-                'preview_url': '',
-                'available_for_tiers': ['free', 'paid']
-            },
-            {
-                'voice_id': 'onyx',
-                'name': 'Onyx',
-                'category': 'standard',
-                'description': 'Voix masculine profonde',
-                'preview_url': '',
-                'available_for_tiers': ['free', 'paid']
-            },
-            {
-                'voice_id': 'nova',
-                'name': 'Nova',
-                'category': 'standard',
-                'description': 'Voix féminine enthousiaste (recommandée pour guides touristiques)',
-                'preview_url': '',
-                'available_for_tiers': ['free', 'paid']
-            },
-            {
-                'voice_id': 'shimmer',
-                'name': 'Shimmer',
-                'category': 'standard',
-                'description': 'Voix féminine chaleureuse',
-                'preview_url': '',
-                'available_for_tiers': ['free', 'paid']
-            }
-        ]
+        return list(_AVAILABLE_VOICES)
 
     def get_voice_info(self, voice_id: Optional[str] = None) -> dict:
         """
@@ -262,10 +399,9 @@ class OpenAITTSClient(BaseTTSClient):
         """
         target_voice_id = voice_id or self.voice_id
 
-        voices = self.get_available_voices()
-        for voice in voices:
-            if voice['voice_id'] == target_voice_id:
-                return voice
+        voice = _VOICE_INFO_BY_ID.get(target_voice_id)
+        if voice is not None:
+            return voice
 
         raise Exception(f"Voix {target_voice_id} non trouvée")
 
@@ -284,7 +420,7 @@ class OpenAITTSClient(BaseTTSClient):
             'character_count': 0,
             'character_limit': 'API-based',
             'note': 'OpenAI TTS facture par requête, pas de quota de caractères publique',
-            'model': 'tts-1-hd',
+            'model': self.model,
             'voices_available': 6
         }
 
@@ -296,7 +432,7 @@ class OpenAITTSClient(BaseTTSClient):
             bool: True si la connexion fonctionne
         """
         if not self.client:
-            print("❌ Client OpenAI TTS non initialisé")
+            logger.error("❌ Client OpenAI TTS non initialisé")
             return False
 
         try:
@@ -304,14 +440,14 @@ class OpenAITTSClient(BaseTTSClient):
             test_text = "Test de connexion OpenAI TTS."
             audio_data = self.generate_audio(test_text)
 
-            print(f"✅ OpenAI TTS connecté et fonctionnel")
-            print(f"   Voix par défaut: {self.voice_id}")
-            print(f"   Voix disponibles: 6 (alloy, echo, fable, onyx, nova, shimmer)")
-            print(f"   Audio test généré: {len(audio_data)} bytes")
+            logger.info("✅ OpenAI TTS connecté et fonctionnel")
+            logger.info("   Voix par défaut: %s", self.voice_id)
+            logger.info("   Voix disponibles: 6 (alloy, echo, fable, onyx, nova, shimmer)")
+            logger.info("   Audio test généré: %d bytes", len(audio_data))
             return True
 
         except Exception as e:
-            print(f"❌ Test connexion OpenAI TTS échoué: {e}")
+            logger.error("❌ Test connexion OpenAI TTS échoué: %s", e)
             return False
 
     def get_narrative_voice_settings(self, style: str = "enthusiastic") -> dict:
@@ -383,7 +519,7 @@ class OpenAITTSClient(BaseTTSClient):
             voice_id = content_to_voice.get(content_type, "nova")
 
         lang_display = language_label or "Langue inconnue"
-        print(f"🎭 Type de contenu: {content_type} - Voix: {voice_id} ({lang_display})")
+        logger.debug("🎭 Type de contenu: %s - Voix: %s (%s)", content_type, voice_id, lang_display)
 
         return self.generate_audio(text, voice_id=voice_id)
 
@@ -402,16 +538,17 @@ class OpenAITTSClient(BaseTTSClient):
         # Prix OpenAI TTS (Janvier 2025)
         # tts-1: $0.015 / 1K caractères
         # tts-1-hd: $0.030 / 1K caractères
-        cost_per_1000_chars_hd = 0.030
+        cost_per_1000_chars = {'tts-1': 0.015, 'tts-1-hd': 0.030}
+        unit_cost = cost_per_1000_chars.get(self.model, 0.015)
 
-        estimated_cost = (char_count / 1000) * cost_per_1000_chars_hd
+        estimated_cost = (char_count / 1000) * unit_cost
 
         return {
             'character_count': char_count,
             'estimated_cost_usd': round(estimated_cost, 4),
             'voice_id': self.voice_id,
-            'model': 'tts-1-hd',
-            'note': 'Prix basé sur tts-1-hd à $0.030/1K caractères'
+            'model': self.model,
+            'note': f'Prix basé sur {self.model} à ${unit_cost}/1K caractères'
         }
 
 
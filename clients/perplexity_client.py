@@ -1,16 +1,39 @@
 """
 Client Perplexity - Traitement optimisé par lots avec parallélisation
 """
+import asyncio
+import atexit
 import os
 import json
+import random
 import re
+import threading
 import time
-from datetime import datetime
+from datetime import datetime, timezone
+from itertools import islice
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Any
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 from utils.logging_config import get_logger, verbose_logging_enabled
 
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:  # orjson optionnel : repli sur le module standard
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
 # Charger les variables d'environnement
 load_dotenv()
 
@@ -35,42 +58,123 @@ def _get_timeout_seconds(env_var: str, default: float) -> float:
 PERPLEXITY_TIMEOUT = _get_timeout_seconds("PERPLEXITY_TIMEOUT_SECONDS", 60.0)
 
 
+def _get_qps_limit() -> float:
+    raw_value = os.getenv("PERPLEXITY_QPS")
+    if not raw_value:
+        return 0.0
+    try:
+        parsed = float(raw_value)
+        if parsed <= 0:
+            raise ValueError("qps must be positive")
+        return parsed
+    except ValueError:
+        logger.warning("⚠️ PERPLEXITY_QPS invalide (%r), limitation désactivée", raw_value)
+        return 0.0
+
+
+# Débit maximal (requêtes/s) vers l'API ; 0 = pas de limitation par débit,
+# seul le sémaphore de concurrence s'applique
+PERPLEXITY_QPS = _get_qps_limit()
+
+
+class _AsyncTokenBucket:
+    """
+    Limiteur de débit token-bucket pour le pipeline asynchrone : découple
+    le débit (quota API) de la concurrence (nombre de lots en vol).
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1.0
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+# Regex précompilées : extraction d'un tableau JSON en fallback de parsing
+# et normalisation des noms pour la déduplication
+_JSON_ARRAY_RE = re.compile(r'\[[^\]]+\]', re.DOTALL)
+_CODE_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+_NONALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+# Les règles fixes vivent dans le message système : elles ne varient pas
+# d'un lot à l'autre, le cache de prompt côté API ne les re-facture pas
+_SYSTEM_MSG = {
+    "role": "system",
+    "content": (
+        "You are a highly selective tourism expert. You rigorously evaluate whether places "
+        "deserve to be included in a premium walking tour of the city given in the user "
+        "message, and respond ONLY with a JSON array, without any other text.\n\n"
+        "NON-NEGOTIABLE RULES:\n"
+        "1. The place MUST be physically located inside the target city. If it is in a suburb "
+        "or neighboring city, reject it unless it is a world-famous landmark strongly "
+        "associated with that city.\n"
+        "2. Only admit PHYSICAL visitable places (monuments, museums, iconic buildings, parks, "
+        "UNESCO sites, historic squares). Reject any service, business, restaurant, café, "
+        "hotel, agency, shop, mall, transport service, station, or purely commercial venue.\n"
+        "3. The place must have clear cultural, historical, or architectural value that "
+        "justifies a dedicated stop on a self-guided tour.\n"
+        "4. If there is any doubt about relevance or location accuracy, reject it.\n\n"
+        "OUTPUT FORMAT (strict JSON, no prose):\n"
+        '[{"index": 0, "decision": "keep"|"reject", "reason": "very short justification (<25 words)"}]\n'
+        'Reasons should mention the decisive criterion (ex: "outside city", "tourist agency", '
+        '"low cultural value"). Ensure every listed place receives one entry.'
+    )
+}
+
+
+# Types à bannir d'office (services, agences, transports, hébergements).
+# Les types Google Places sont déjà normalisés en minuscules.
+_BANNED_TYPES = frozenset({
+    "travel_agency",
+    "real_estate_agency",
+    "lodging",
+    "hotel",
+    "restaurant",
+    "cafe",
+    "bar",
+    "store",
+    "clothing_store",
+    "shopping_mall",
+    "department_store",
+    "meal_takeaway",
+    "meal_delivery",
+    "car_rental",
+    "tour_operator",
+    "tourist_information_center",
+    "train_station",
+    "bus_station",
+    "airport",
+    "subway_station",
+    "light_rail_station",
+    "taxi_stand",
+    "gas_station",
+    "parking",
+    "night_club",
+    "gym",
+    "spa",
+    "beauty_salon"
+})
+
+
 class PerplexityClient:
     """
     Client pour l'API Perplexity avec traitement par lots de 5 et parallélisation
     """
 
-    # Types à bannir d'office (services, agences, transports, hébergements)
-    BANNED_TYPES = {
-        "travel_agency",
-        "real_estate_agency",
-        "lodging",
-        "hotel",
-        "restaurant",
-        "cafe",
-        "bar",
-        "store",
-        "clothing_store",
-        "shopping_mall",
-        "department_store",
-        "meal_takeaway",
-        "meal_delivery",
-        "car_rental",
-        "tour_operator",
-        "tourist_information_center",
-        "train_station",
-        "bus_station",
-        "airport",
-        "subway_station",
-        "light_rail_station",
-        "taxi_stand",
-        "gas_station",
-        "parking",
-        "night_club",
-        "gym",
-        "spa",
-        "beauty_salon"
-    }
+    BANNED_TYPES = _BANNED_TYPES
 
     def __init__(self, max_workers: int = 5, batch_size: int = 5):
         """
@@ -91,6 +195,15 @@ class PerplexityClient:
         }
         self.max_workers = max_workers
         self.batch_size = batch_size
+        # Session keep-alive partagée pour le chemin synchrone : plus de
+        # handshake TCP+TLS par lot (les retries restent gérés ici)
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=max_workers * 2, pool_maxsize=max_workers * 2)
+        self._session.mount("https://", adapter)
+        # Fenêtre de rate limit partagée entre lots async : après un 429,
+        # les autres tâches attendent la fin de la fenêtre avant d'émettre
+        self._rate_limit_until = 0.0
         log_path = os.getenv("PERPLEXITY_FILTER_LOG", os.path.join("logs", "perplexity_filter.log"))
         abs_path = os.path.abspath(log_path)
         log_dir = os.path.dirname(abs_path)
@@ -101,11 +214,32 @@ class PerplexityClient:
                 logger.warning("⚠️ Impossible de créer le dossier de logs (%s): %s. Logging fichier désactivé.", log_dir, err)
                 abs_path = None
         self.log_file = abs_path
+
+        # Descripteur ouvert une fois pour toute la session : évite le
+        # open()/close() par lot, les appends restent atomiques via O_APPEND
+        self._log_fh = None
+        self._log_lock = threading.Lock()
+        if abs_path:
+            try:
+                self._log_fh = open(abs_path, "ab", buffering=0)
+                atexit.register(self._log_fh.close)
+            except OSError as err:
+                logger.warning("⚠️ Impossible d'ouvrir le log Perplexity (%s): %s. Logging fichier désactivé.", abs_path, err)
+                self.log_file = None
+
+        # Variante de journalisation choisie une fois pour toutes : plus de
+        # test VERBOSE_LOGS par décision dans la boucle chaude
+        self._log_decisions = (
+            self._log_decisions_verbose if VERBOSE_LOGS else self._log_decisions_quiet
+        )
     
     def filter_attractions(self, attractions: List[Dict[str, Any]], city: str, country: str) -> List[Dict[str, Any]]:
         """
         Filtre les attractions par lots de 5 avec parallélisation
-        
+
+        Note: les dictionnaires d'attractions fournis sont annotés en place
+        (filter_reason) ; la liste d'entrée est considérée comme consommée.
+
         Args:
             attractions: Liste des attractions à filtrer
             city: Nom de la ville
@@ -117,38 +251,27 @@ class PerplexityClient:
         if not attractions:
             return []
 
-        # Pré-filtrer les services évidents via types Google
-        cleaned_attractions = []
-        banned_count = 0
-        for attraction in attractions:
-            types = {t.lower() for t in attraction.get("types", [])}
-            if types & self.BANNED_TYPES:
-                banned_count += 1
-                continue
-            cleaned_attractions.append(attraction)
-
-        if banned_count:
-            logger.info("🚫 %s lieux exclus immédiatement (types interdits)", banned_count)
-
+        cleaned_attractions = self._prefilter_attractions(attractions)
         if not cleaned_attractions:
-            logger.warning("❌ Aucune attraction admissible après pré-filtrage.")
             return []
 
-        # Diviser les attractions en lots de 5
-        batches = self._create_batches(cleaned_attractions)
-        
+        total_batches = -(-len(cleaned_attractions) // self.batch_size)
+
         logger.info("🚀 Filtrage de %s attractions par lots de %s", len(attractions), self.batch_size)
-        logger.info("📦 Nombre de lots: %s", len(batches))
+        logger.info("📦 Nombre de lots: %s", total_batches)
         logger.info("⚡ Threads parallèles: %s", self.max_workers)
         
-        # Traitement parallèle des lots
-        filtered_attractions = []
-        
+        # Traitement parallèle des lots, déduplication fusionnée au fil des
+        # résultats (une seule passe, pas de liste intermédiaire re-balayée)
+        normalized: Dict[str, Dict[str, Any]] = {}
+        kept_count = 0
+
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Soumettre tous les lots
+            # Soumettre les lots au fil de leur découpage (pas de liste
+            # intermédiaire de tranches)
             future_to_batch = {
                 executor.submit(self._process_batch, batch, batch_idx, city, country): (batch, batch_idx)
-                for batch_idx, batch in enumerate(batches)
+                for batch_idx, batch in enumerate(self._iter_batches(cleaned_attractions))
             }
             
             # Récupérer les résultats au fur et à mesure
@@ -157,40 +280,125 @@ class PerplexityClient:
                 
                 try:
                     batch_result = future.result()
-                    filtered_attractions.extend(batch_result)
                     logger.debug(
                         "✅ Lot %s/%s terminé - %s attractions conservées",
                         batch_idx + 1,
-                        len(batches),
+                        total_batches,
                         len(batch_result),
                     )
                     
                 except Exception as e:
                     logger.error("❌ Erreur sur le lot %s: %s", batch_idx + 1, e)
                     logger.debug("🔄 Conservation par défaut du lot %s", batch_idx + 1)
-                    filtered_attractions.extend(batch)
+                    batch_result = batch
+
+                kept_count += len(batch_result)
+                for attr in batch_result:
+                    self._insert_deduped(normalized, attr)
         
         logger.info(
             "🎯 Filtrage terminé: %s/%s attractions conservées (avant déduplication)",
-            len(filtered_attractions),
+            kept_count,
             len(cleaned_attractions),
         )
         
-        deduped = self._deduplicate_attractions(filtered_attractions)
-        if len(deduped) != len(filtered_attractions):
-            logger.info("🧼 Déduplication: %s doublon(s) retiré(s)", len(filtered_attractions) - len(deduped))
+        deduped = self._strip_scores(normalized)
+        if len(deduped) != kept_count:
+            logger.info("🧼 Déduplication: %s doublon(s) retiré(s)", kept_count - len(deduped))
 
         return deduped
     
-    def _create_batches(self, attractions: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    async def filter_attractions_async(self, attractions: List[Dict[str, Any]], city: str, country: str) -> List[Dict[str, Any]]:
         """
-        Divise les attractions en lots de taille batch_size
+        Variante asynchrone de filter_attractions : tous les lots partent en
+        parallèle sur un seul client HTTP partagé (keep-alive + HTTP/2),
+        sans payer un thread par lot.
         """
-        batches = []
-        for i in range(0, len(attractions), self.batch_size):
-            batch = attractions[i:i + self.batch_size]
-            batches.append(batch)
-        return batches
+        if not attractions:
+            return []
+
+        cleaned_attractions = self._prefilter_attractions(attractions)
+        if not cleaned_attractions:
+            return []
+
+        # Le chemin async garde la liste des lots sous la main pour le repli
+        # conservateur en cas d'échec d'un lot
+        batches = list(self._iter_batches(cleaned_attractions))
+
+        logger.info("🚀 Filtrage async de %s attractions par lots de %s", len(attractions), self.batch_size)
+        logger.info("📦 Nombre de lots: %s", len(batches))
+
+        # Avec un bucket de débit, la concurrence n'est plus le mécanisme de
+        # limitation : le sémaphore ne sert que de garde-fou large
+        bucket = _AsyncTokenBucket(PERPLEXITY_QPS) if PERPLEXITY_QPS > 0 else None
+        semaphore = asyncio.Semaphore(32 if bucket else self.max_workers)
+        # HTTP/2 multiplexe tous les lots sur une seule connexion TLS (un
+        # seul handshake amorti) ; la limite haute ne sert que de marge si
+        # le serveur rétrograde silencieusement en HTTP/1.1
+        async with httpx.AsyncClient(
+            http2=True,
+            timeout=PERPLEXITY_TIMEOUT,
+            headers=self.headers,
+            limits=httpx.Limits(
+                max_keepalive_connections=2,
+                max_connections=self.max_workers,
+            ),
+        ) as client:
+            results = await asyncio.gather(*[
+                self._process_batch_async(client, semaphore, bucket, batch, batch_idx, city, country)
+                for batch_idx, batch in enumerate(batches)
+            ], return_exceptions=True)
+
+        normalized: Dict[str, Dict[str, Any]] = {}
+        kept_count = 0
+        for batch_idx, (batch, result) in enumerate(zip(batches, results)):
+            if isinstance(result, BaseException):
+                logger.error("❌ Erreur sur le lot %s: %s", batch_idx + 1, result)
+                logger.debug("🔄 Conservation par défaut du lot %s", batch_idx + 1)
+                result = batch
+            kept_count += len(result)
+            for attr in result:
+                self._insert_deduped(normalized, attr)
+
+        logger.info(
+            "🎯 Filtrage terminé: %s/%s attractions conservées (avant déduplication)",
+            kept_count,
+            len(cleaned_attractions),
+        )
+
+        deduped = self._strip_scores(normalized)
+        if len(deduped) != kept_count:
+            logger.info("🧼 Déduplication: %s doublon(s) retiré(s)", kept_count - len(deduped))
+
+        return deduped
+
+    def _prefilter_attractions(self, attractions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Pré-filtre les services évidents via types Google avant tout appel API.
+        """
+        # Pas de set intermédiaire ni de .lower() : les types Google sont
+        # déjà en minuscules, any() court-circuite au premier type banni
+        cleaned_attractions = [
+            attraction for attraction in attractions
+            if not any(t in _BANNED_TYPES for t in attraction.get("types", ()))
+        ]
+        banned_count = len(attractions) - len(cleaned_attractions)
+
+        if banned_count:
+            logger.info("🚫 %s lieux exclus immédiatement (types interdits)", banned_count)
+
+        if not cleaned_attractions:
+            logger.warning("❌ Aucune attraction admissible après pré-filtrage.")
+
+        return cleaned_attractions
+
+    def _iter_batches(self, attractions: List[Dict[str, Any]]):
+        """
+        Découpe paresseusement les attractions en lots de taille batch_size
+        """
+        it = iter(attractions)
+        while chunk := list(islice(it, self.batch_size)):
+            yield chunk
     
     def _process_batch(self, batch: List[Dict[str, Any]], batch_idx: int, city: str, country: str) -> List[Dict[str, Any]]:
         """
@@ -206,62 +414,9 @@ class PerplexityClient:
             Liste filtrée des attractions du lot
         """
         logger.debug("🔄 Traitement du lot %s (%s attractions)...", batch_idx + 1, len(batch))
-        
-        # Préparer les données du lot
-        batch_data = []
-        for idx, attraction in enumerate(batch):
-            name = attraction.get("name", "")
-            types = attraction.get("types", [])
-            rating = attraction.get("rating", 0)
-            user_ratings_total = attraction.get("user_ratings_total", 0)
-            formatted_address = attraction.get("formatted_address", "")
-            
-            batch_data.append({
-                "index": idx,
-                "name": name,
-                "address": formatted_address,
-                "types": types,
-                "rating": rating,
-                "user_ratings_total": user_ratings_total
-            })
-        
-        # Créer le prompt optimisé pour le lot (SANS description)
-        prompt = f"""
-As a tourism expert for {city}, {country}, rigorously evaluate these {len(batch)} places to decide if they deserve to be included in a premium walking tour.
-
-{json.dumps(batch_data, ensure_ascii=False, indent=2)}
 
-NON-NEGOTIABLE RULES:
-1. The place MUST be physically located inside {city}, {country}. If it is in a suburb or neighboring city, reject it unless it is a world-famous landmark strongly associated with {city}.
-2. Only admit PHYSICAL visitable places (monuments, museums, iconic buildings, parks, UNESCO sites, historic squares). Reject any service, business, restaurant, café, hotel, agency, shop, mall, transport service, station, or purely commercial venue.
-3. The place must have clear cultural, historical, or architectural value that justifies a dedicated stop on a self-guided tour.
-4. If there is any doubt about relevance or location accuracy, reject it.
+        payload = self._build_batch_payload(batch, city, country)
 
-OUTPUT FORMAT (strict JSON, no prose):
-[
-  {{"index": 0, "decision": "keep"|"reject", "reason": "very short justification (<25 words)"}}
-]
-
-Reasons should mention the decisive criterion (ex: "outside city", "tourist agency", "low cultural value"). Ensure every listed place receives one entry.
-"""
-        
-        # Préparer la requête API
-        payload = {
-            "model": "sonar",
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "You are a highly selective tourism expert. You evaluate the tourist relevance of places and respond ONLY with a JSON array of indices, without any other text."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.1,
-            "max_tokens": 200
-        }
-        
         try:
             # Appel API avec retry
             response = None
@@ -269,8 +424,7 @@ Reasons should mention the decisive criterion (ex: "outside city", "tourist agen
             
             for attempt in range(max_retries):
                 try:
-                    import requests
-                    response = requests.post(self.base_url, headers=self.headers, json=payload, timeout=PERPLEXITY_TIMEOUT)
+                    response = self._session.post(self.base_url, json=payload, timeout=PERPLEXITY_TIMEOUT)
                     
                     if response.status_code == 200:
                         break
@@ -301,80 +455,188 @@ Reasons should mention the decisive criterion (ex: "outside city", "tourist agen
                 return batch  # Retourner le lot original en cas d'échec
             
             # Traiter la réponse
+            response_data = _json_loads(response.content)
+            content = response_data.get("choices", [{}])[0].get("message", {}).get("content", "[]").strip()
+
+            return self._handle_batch_response(content, batch, batch_idx, city, country)
+
+        except Exception as e:
+            logger.warning("⚠️ Exception dans le lot %s: %s", batch_idx + 1, e)
+            return batch  # Retourner le lot original en cas d'exception
+
+    async def _process_batch_async(
+        self,
+        client: "httpx.AsyncClient",
+        semaphore: "asyncio.Semaphore",
+        bucket: "_AsyncTokenBucket",
+        batch: List[Dict[str, Any]],
+        batch_idx: int,
+        city: str,
+        country: str,
+    ) -> List[Dict[str, Any]]:
+        """
+        Équivalent asynchrone de _process_batch sur le client httpx partagé.
+        Le sémaphore borne la concurrence ; le backoff jitteré évite que
+        tous les lots re-tentent en cadence après un 429.
+        """
+        logger.debug("🔄 Traitement du lot %s (%s attractions)...", batch_idx + 1, len(batch))
+
+        payload = self._build_batch_payload(batch, city, country)
+
+        try:
+            response = None
+            max_retries = 3
+
+            for attempt in range(max_retries):
+                # Respecter la fenêtre de rate limit avant de prendre un slot
+                delay = self._rate_limit_until - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                try:
+                    async with semaphore:
+                        if bucket is not None:
+                            await bucket.acquire()
+                        response = await client.post(self.base_url, json=payload)
+
+                    if response.status_code == 200:
+                        break
+                    elif response.status_code == 429:  # Rate limit
+                        wait_time = self._retry_wait(response, attempt)
+                        self._rate_limit_until = max(
+                            self._rate_limit_until, time.monotonic() + wait_time
+                        )
+                        logger.warning(
+                            "⏳ Rate limit - Attente %.1fs (tentative %s/%s)",
+                            wait_time,
+                            attempt + 1,
+                            max_retries,
+                        )
+                        await asyncio.sleep(wait_time)
+                    else:
+                        logger.warning(
+                            "⚠️ Erreur API %s (tentative %s/%s)",
+                            response.status_code,
+                            attempt + 1,
+                            max_retries,
+                        )
+
+                except httpx.TimeoutException:
+                    logger.warning("⏰ Timeout (tentative %s/%s)", attempt + 1, max_retries)
+                    if attempt < max_retries - 1:
+                        await asyncio.sleep(1)
+
+            if response is None or response.status_code != 200:
+                logger.error("❌ Échec définitif du lot %s", batch_idx + 1)
+                return batch  # Retourner le lot original en cas d'échec
+
             response_data = response.json()
             content = response_data.get("choices", [{}])[0].get("message", {}).get("content", "[]").strip()
-            
-            decisions = self._parse_indices_response(content, len(batch))
-            self._log_decisions(city, country, batch_idx, batch, decisions)
-
-            filtered_batch = []
-            for entry in decisions:
-                idx = entry["index"]
-                if entry.get("decision") == "keep" and 0 <= idx < len(batch):
-                    kept = dict(batch[idx])
-                    if entry.get("reason"):
-                        kept["filter_reason"] = entry.get("reason")
-                    filtered_batch.append(kept)
-
-            return filtered_batch
-            
+
+            return self._handle_batch_response(content, batch, batch_idx, city, country)
+
         except Exception as e:
             logger.warning("⚠️ Exception dans le lot %s: %s", batch_idx + 1, e)
             return batch  # Retourner le lot original en cas d'exception
+
+    @staticmethod
+    def _retry_wait(response, attempt: int) -> float:
+        """
+        Délai avant retry : Retry-After si fourni, sinon backoff exponentiel
+        décorrélé (jitter) pour lisser les re-tentatives concurrentes.
+        """
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return random.uniform(1.0, 3.0 * 2 ** attempt)
+
+    def _build_batch_payload(self, batch: List[Dict[str, Any]], city: str, country: str) -> Dict[str, Any]:
+        """
+        Construit la requête chat-completion pour un lot d'attractions.
+        """
+        # Préparer les données du lot en une seule compréhension (pas de
+        # variables intermédiaires ni d'appends successifs)
+        batch_data = [
+            {
+                "index": idx,
+                "name": attraction.get("name", ""),
+                "address": attraction.get("formatted_address", ""),
+                "types": attraction.get("types", []),
+                "rating": attraction.get("rating", 0),
+                "user_ratings_total": attraction.get("user_ratings_total", 0)
+            }
+            for idx, attraction in enumerate(batch)
+        ]
+
+        # Le message utilisateur ne porte que les données variables, en JSON
+        # compact : les règles fixes sont déjà dans le message système
+        prompt = _json_dumps({
+            "city": city,
+            "country": country,
+            "places": batch_data,
+        })
+
+        return {
+            "model": "sonar",
+            "messages": [
+                _SYSTEM_MSG,
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.1,
+            "max_tokens": 200
+        }
+
+    def _handle_batch_response(
+        self,
+        content: str,
+        batch: List[Dict[str, Any]],
+        batch_idx: int,
+        city: str,
+        country: str,
+    ) -> List[Dict[str, Any]]:
+        """
+        Parse les décisions du modèle, les journalise et construit le lot filtré.
+        """
+        decisions = self._parse_indices_response(content, len(batch))
+        self._log_decisions(city, country, batch_idx, batch, decisions)
+
+        # Pas de copie par élément conservé : le lot n'est pas réutilisé par
+        # l'appelant, on annote l'attraction en place
+        filtered_batch = []
+        for entry in decisions:
+            idx = entry["index"]
+            if entry.get("decision") == "keep" and 0 <= idx < len(batch):
+                kept = batch[idx]
+                if entry.get("reason"):
+                    kept["filter_reason"] = entry.get("reason")
+                filtered_batch.append(kept)
+
+        return filtered_batch
     
     def _parse_indices_response(self, content: str, max_index: int) -> List[dict]:
         """
         Parse la réponse de l'API pour extraire les indices à conserver + raisons
         """
+        # Retirer les éventuelles clôtures ``` en une passe
+        cleaned_content = _CODE_FENCE_RE.sub("", content.strip()).strip()
+
+        # Fast path : la quasi-totalité des réponses est un tableau JSON
+        # propre, inutile de passer par la regex de récupération
         try:
-            # Nettoyer le contenu
-            cleaned_content = content.strip()
-            if cleaned_content.startswith('```json'):
-                cleaned_content = cleaned_content[7:]
-            if cleaned_content.endswith('```'):
-                cleaned_content = cleaned_content[:-3]
-            cleaned_content = cleaned_content.strip()
-
-            # Parser le JSON
-            payload = json.loads(cleaned_content)
-
-            # Attendu : liste d'objets {"index": int, "decision": "...", "reason": "..."}
-            decisions = []
-            if isinstance(payload, list):
-                for entry in payload:
-                    if (
-                        isinstance(entry, dict)
-                        and isinstance(entry.get("index"), int)
-                        and 0 <= entry["index"] < max_index
-                        and entry.get("decision") in {"keep", "reject"}
-                    ):
-                        decisions.append({
-                            "index": entry["index"],
-                            "decision": entry["decision"],
-                            "reason": entry.get("reason")
-                        })
+            decisions = self._validate_decisions(_json_loads(cleaned_content), max_index)
             if decisions:
                 return decisions
-
-        except json.JSONDecodeError:
-            match = re.search(r'\[[^\]]+\]', content, re.DOTALL)
+        except ValueError:
+            match = _JSON_ARRAY_RE.search(content)
             if match:
                 try:
-                    payload = json.loads(match.group(0))
-                    decisions = []
-                    if isinstance(payload, list):
-                        for entry in payload:
-                            if (
-                                isinstance(entry, dict)
-                                and isinstance(entry.get("index"), int)
-                                and 0 <= entry["index"] < max_index
-                                and entry.get("decision") in {"keep", "reject"}
-                            ):
-                                decisions.append({
-                                    "index": entry["index"],
-                                    "decision": entry["decision"],
-                                    "reason": entry.get("reason")
-                                })
+                    decisions = self._validate_decisions(_json_loads(match.group(0)), max_index)
                     if decisions:
                         return decisions
                 except Exception:
@@ -384,47 +646,101 @@ Reasons should mention the decisive criterion (ex: "outside city", "tourist agen
         logger.warning("⚠️ Impossible de parser la réponse Perplexity: %s...", content[:100])
         return [{"index": i, "decision": "keep", "reason": None} for i in range(max_index)]
 
-    def _log_decisions(self, city: str, country: str, batch_idx: int, batch: List[Dict[str, Any]], decisions: List[Dict[str, Any]]):
+    @staticmethod
+    def _validate_decisions(payload: Any, max_index: int) -> List[dict]:
+        """
+        Valide la liste d'objets {"index": int, "decision": "...", "reason": "..."}.
+        """
+        decisions = []
+        if isinstance(payload, list):
+            for entry in payload:
+                if (
+                    isinstance(entry, dict)
+                    and isinstance(entry.get("index"), int)
+                    and 0 <= entry["index"] < max_index
+                    and entry.get("decision") in {"keep", "reject"}
+                ):
+                    decisions.append({
+                        "index": entry["index"],
+                        "decision": entry["decision"],
+                        "reason": entry.get("reason")
+                    })
+        return decisions
+
+    def _log_decisions_verbose(self, city: str, country: str, batch_idx: int, batch: List[Dict[str, Any]], decisions: List[Dict[str, Any]]):
         """
         Enregistre les décisions dans un fichier et affiche un récap console.
         """
-        timestamp = datetime.utcnow().isoformat() + "Z"
         lines = []
+        common = self._log_common_fields(city, country, batch_idx)
         for entry in decisions:
             idx = entry["index"]
             attraction = batch[idx] if 0 <= idx < len(batch) else {}
             name = attraction.get("name", "Unknown")
-            decision = entry.get("decision")
-            reason = entry.get("reason")
-            if VERBOSE_LOGS:
-                logger.debug(
-                    "📝 Lot %s – %s: %s (%s)",
-                    batch_idx + 1,
-                    name,
-                    (decision or "UNKNOWN").upper(),
-                    reason or "raison inconnue",
-                )
-            payload = {
-                "timestamp": timestamp,
-                "city": city,
-                "country": country,
-                "batch": batch_idx + 1,
-                "attraction_name": name,
-                "attraction_address": attraction.get("formatted_address"),
-                "types": attraction.get("types", []),
-                "rating": attraction.get("rating"),
-                "user_ratings_total": attraction.get("user_ratings_total"),
-                "decision": decision,
-                "reason": reason
-            }
-            lines.append(json.dumps(payload, ensure_ascii=False))
+            logger.debug(
+                "📝 Lot %s – %s: %s (%s)",
+                batch_idx + 1,
+                name,
+                (entry.get("decision") or "UNKNOWN").upper(),
+                entry.get("reason") or "raison inconnue",
+            )
+            if self._log_fh:
+                lines.append(self._decision_line(common, attraction, entry))
+
+        self._write_log_lines(lines)
+
+    def _log_decisions_quiet(self, city: str, country: str, batch_idx: int, batch: List[Dict[str, Any]], decisions: List[Dict[str, Any]]):
+        """
+        Variante sans sortie console : uniquement le fichier JSONL.
+        """
+        if not self._log_fh:
+            return
+
+        common = self._log_common_fields(city, country, batch_idx)
+        lines = [
+            self._decision_line(
+                common,
+                batch[entry["index"]] if 0 <= entry["index"] < len(batch) else {},
+                entry,
+            )
+            for entry in decisions
+        ]
+        self._write_log_lines(lines)
 
-        if not self.log_file:
+    @staticmethod
+    def _log_common_fields(city: str, country: str, batch_idx: int) -> Dict[str, Any]:
+        # Horodatage et champs communs calculés une fois par lot
+        timestamp = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        return {
+            "timestamp": timestamp,
+            "city": city,
+            "country": country,
+            "batch": batch_idx + 1,
+        }
+
+    @staticmethod
+    def _decision_line(common: Dict[str, Any], attraction: Dict[str, Any], entry: Dict[str, Any]) -> str:
+        return _json_dumps({
+            **common,
+            "attraction_name": attraction.get("name", "Unknown"),
+            "attraction_address": attraction.get("formatted_address"),
+            "types": attraction.get("types", []),
+            "rating": attraction.get("rating"),
+            "user_ratings_total": attraction.get("user_ratings_total"),
+            "decision": entry.get("decision"),
+            "reason": entry.get("reason")
+        })
+
+    def _write_log_lines(self, lines: List[str]):
+        if not lines or not self._log_fh:
             return
 
         try:
-            with open(self.log_file, "a", encoding="utf-8") as log_file:
-                log_file.write("\n".join(lines) + "\n")
+            # Une seule écriture par lot : un write() unique sur un fd
+            # O_APPEND est atomique côté noyau
+            data = ("\n".join(lines) + "\n").encode("utf-8")
+            with self._log_lock:
+                self._log_fh.write(data)
         except Exception as log_error:
             logger.warning("⚠️ Impossible d'écrire le log Perplexity: %s", log_error)
 
@@ -432,31 +748,45 @@ Reasons should mention the decisive criterion (ex: "outside city", "tourist agen
         """
         Supprime les doublons en privilégiant la meilleure note / popularité
         """
-        normalized = {}
-
+        normalized: Dict[str, Dict[str, Any]] = {}
         for attr in attractions:
-            name = attr.get("name", "").strip().lower()
-            if not name:
-                key = attr.get("place_id") or attr.get("id") or str(id(attr))
-            else:
-                key = re.sub(r"[^a-z0-9]+", "", name)
-
-            score = self._score_attraction(attr)
-            stored = normalized.get(key)
-            if not stored or score > stored["__score"]:
-                attr_copy = dict(attr)
-                attr_copy["__score"] = score
-                normalized[key] = attr_copy
+            self._insert_deduped(normalized, attr)
+        return self._strip_scores(normalized)
 
+    def _insert_deduped(self, normalized: Dict[str, Dict[str, Any]], attr: Dict[str, Any]):
+        """
+        Insère une attraction dans l'index de déduplication, en gardant la
+        meilleure note / popularité pour un même nom normalisé.
+        """
+        name = attr.get("name", "").strip().lower()
+        if not name:
+            key = attr.get("place_id") or attr.get("id") or str(id(attr))
+        else:
+            key = _NONALNUM_RE.sub("", name)
+
+        score = self._score_attraction(attr)
+        stored = normalized.get(key)
+        if not stored or score > stored["__score"]:
+            attr_copy = dict(attr)
+            attr_copy["__score"] = score
+            normalized[key] = attr_copy
+
+    @staticmethod
+    def _strip_scores(normalized: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
         for attr in normalized.values():
             attr.pop("__score", None)
-
         return list(normalized.values())
 
     @staticmethod
     def _score_attraction(attraction: Dict[str, Any]) -> float:
-        rating = float(attraction.get("rating") or 0)
-        reviews = float(attraction.get("user_ratings_total") or 0)
+        # Fast-path : rating/user_ratings_total arrivent déjà numériques de
+        # Google Places, la conversion float() n'est payée que sur l'exception
+        rating = attraction.get("rating")
+        if not isinstance(rating, (int, float)):
+            rating = float(rating) if rating else 0.0
+        reviews = attraction.get("user_ratings_total")
+        if not isinstance(reviews, (int, float)):
+            reviews = float(reviews) if reviews else 0.0
         return rating * 10 + reviews
     
     def get_filtering_stats(self, original_count: int, filtered_count: int) -> Dict[str, Any]:
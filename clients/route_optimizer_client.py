@@ -2,29 +2,82 @@
 RouteOptimizer - Clustering géographique intelligent avec contraintes temporelles
 🎯 Tours cohérents sans points isolés
 """
+import heapq
 import os
+from array import array
+import sqlite3
+import threading
 import time
 import json
 import math
 import random
-import requests
+import httpx
+import numpy as np
 import polyline
+
+try:
+    # Décodeur C optionnel : API identique, ~10x plus rapide que la boucle
+    # caractère par caractère du module polyline pur Python
+    from polyline2 import decode as _decode_polyline
+except ImportError:
+    _decode_polyline = polyline.decode
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import product
 from typing import List, Dict, Any, Tuple, Optional, Set
 from dotenv import load_dotenv
 from utils.logging_config import get_logger, verbose_logging_enabled
 from utils.path_validation import ensure_path_endpoints
 
+try:
+    import orjson
+except ImportError:  # orjson optionnel : repli sur le module standard
+    orjson = None
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # scipy optionnel : repli sur le balayage complet
+    cKDTree = None
+
 # Charger les variables d'environnement
 load_dotenv()
 
 logger = get_logger(__name__)
 VERBOSE_LOGS = verbose_logging_enabled()
 
+from clients._tsp_numba import two_opt_kernel, nearest_neighbor_kernel
+
+# Mètres parcourus par minute de marche (5 km/h = 1.39 m/s)
+_METERS_PER_WALKING_MINUTE = 1.39 * 60
+
+# Table de correspondance figée des 16 combinaisons début/fin possibles :
+# le type de connexion devient un simple lookup de tuple
+_CONNECTION_TYPE_LOOKUP = {}
+
 class RouteOptimizer:
     """
     🔥 Optimiseur - Clustering d'abord, TSP ensuite !
     Fini les points isolés, vive les tours cohérents !
     """
+    # Durée de vie des distances persistées (les rues bougent peu)
+    DISTANCE_CACHE_TTL = 30 * 24 * 3600  # 30 jours
+
+    # Client HTTP partagé entre toutes les instances (double-checked lock)
+    _HTTP: Optional["httpx.Client"] = None
+    _HTTP_LOCK = threading.Lock()
+
+    @classmethod
+    def _get_http_client(cls) -> "httpx.Client":
+        if cls._HTTP is None:
+            with cls._HTTP_LOCK:
+                if cls._HTTP is None:
+                    cls._HTTP = httpx.Client(
+                        http2=True,
+                        timeout=10.0,
+                        transport=httpx.HTTPTransport(retries=3),
+                    )
+        return cls._HTTP
+
     def __init__(self, max_walking_minutes: int = 15):
         """
         Initialise l'optimiseur révolutionnaire
@@ -37,12 +90,35 @@ class RouteOptimizer:
             raise ValueError("🚨 Clé API Google manquante dans .env")
         
         self.directions_base_url = "https://maps.googleapis.com/maps/api/directions/json"
+        self.distance_matrix_base_url = "https://maps.googleapis.com/maps/api/distancematrix/json"
         self.max_walking_minutes = max_walking_minutes
         self.max_walking_distance = max_walking_minutes * 60 * 1.39  # 20min = 1668m à 5km/h
         
+        # Client HTTP/2 partagé entre instances (thread-safe) : tous les
+        # appels vers maps.googleapis.com se multiplexent sur une même
+        # connexion TLS au lieu de payer un handshake par requête
+        self._http = self._get_http_client()
+
         # Cache optimisé
         self.distance_cache = {}
         self.directions_cache = {}
+        # Réordonnancements Google mémorisés par signature d'ensemble de
+        # points : les fusions répétées sur le même jeu ne repaient pas l'API
+        self.directions_optim_cache = {}
+
+        # Cache persistant sur disque : les distances Google d'une ville déjà
+        # traitée survivent d'une exécution à l'autre
+        self._db_lock = threading.Lock()
+        self._distance_db = self._init_distance_db()
+
+        # Matrice globale et index des clusters de la dernière optimisation :
+        # les matrices par cluster sont des tranches, pas des reconstructions
+        self._global_dist = None
+        self._cluster_index_lists = None
+
+        # Passe à True quand l'API Distance Matrix ne répond plus du tout :
+        # les préchargements suivants repartent directement en fan-out unitaire
+        self._matrix_batch_unavailable = False
         
         logger.info("🎯 RouteOptimizer initialisé - Contrainte: ≤%s min entre POIs", max_walking_minutes)
     
@@ -81,7 +157,14 @@ class RouteOptimizer:
         for i, cluster in enumerate(clusters):
             if VERBOSE_LOGS:
                 logger.debug("   🎯 Optimisation du cluster %s...", i + 1)
-            cluster_result = self._optimize_cluster(cluster, i+1, global_index_counter)
+            cluster_indices = (
+                self._cluster_index_lists[i]
+                if self._cluster_index_lists and i < len(self._cluster_index_lists)
+                else None
+            )
+            cluster_result = self._optimize_cluster(
+                cluster, i+1, global_index_counter, global_indices=cluster_indices
+            )
             
             # Mettre à jour le compteur global pour le cluster suivant
             global_index_counter += len(cluster_result['points'])
@@ -156,44 +239,79 @@ class RouteOptimizer:
         🧠 Clustering intelligent basé sur la contrainte temporelle de marche
         """
         if len(attractions) <= 2:
+            self._global_dist = None
+            self._cluster_index_lists = None
             return [attractions]
         
         # Construire la matrice de distances temporelles
         logger.info("🔄 Construction de la matrice de distances...")
         distance_matrix = self._build_walking_time_matrix(attractions)
-        
-        # Convertir en matrice binaire (1 si ≤20min, 0 sinon)
-        binary_matrix = self._distance_matrix_to_binary(distance_matrix)
-        
+        self._global_dist = distance_matrix
+
+        # Listes d'adjacence directement depuis le seuillage : pas de
+        # matrice binaire n×n intermédiaire
+        n = len(attractions)
+        reachable = distance_matrix <= self.max_walking_distance
+        np.fill_diagonal(reachable, True)  # Un point est connecté à lui-même
+        adjacency = [np.flatnonzero(reachable[i]) for i in range(n)]
+
         # Clustering basé sur la connectivité
-        clusters = self._connected_components_clustering(binary_matrix, attractions)
+        clusters = self._connected_components_clustering(adjacency, attractions)
         
         # Garder tous les clusters sans limite de taille
         # La fusion intelligente s'occupera de l'optimisation
         return clusters
     
-    def _build_walking_time_matrix(self, attractions: List[Dict[str, Any]]) -> List[List[float]]:
+    def _build_walking_time_matrix(self, attractions: List[Dict[str, Any]]) -> "np.ndarray":
         """
-        🗺️ Construit la matrice des temps de marche réels via Google Directions
+        🗺️ Construit la matrice des temps de marche réels via Google.
+
+        Passe d'abord par l'API Distance Matrix (jusqu'à 625 paires par
+        requête) ; retombe sur les appels Directions paire par paire si
+        l'API batch est indisponible.
         """
         n = len(attractions)
-        matrix = [[0.0] * n for _ in range(n)]
-        
+        # float32 contigu : 8x moins de mémoire que des floats boxés et des
+        # comparaisons vectorisées pour le seuillage en aval
+        matrix = np.zeros((n, n), dtype=np.float32)
+        locations = [attr["geometry"]["location"] for attr in attractions]
+
+        batched = self._fetch_distance_matrix_batched(locations)
+        # Matrice haversine calculée une seule fois (vectorisée) et
+        # uniquement si au moins une paire doit retomber sur l'approximation
+        haversine_m = None
+
+        if batched is not None:
+            for i in range(n):
+                for j in range(i + 1, n):
+                    distance = batched[i][j]
+                    if distance is None:
+                        distance = batched[j][i]
+                    if distance is None:
+                        if haversine_m is None:
+                            haversine_m = self._haversine_matrix(locations)
+                        distance = haversine_m[i, j]
+                    matrix[i][j] = distance
+                    matrix[j][i] = distance  # Symétrique
+            return matrix
+
         total_calls = (n * (n - 1)) // 2
         calls_made = 0
         
         for i in range(n):
             for j in range(i + 1, n):
-                origin = attractions[i]["geometry"]["location"]
-                destination = attractions[j]["geometry"]["location"]
+                origin = locations[i]
+                destination = locations[j]
                 
                 distance = self._get_walking_distance_cached(origin, destination)
                 if distance is not None:
                     matrix[i][j] = distance
                     matrix[j][i] = distance  # Symétrique
                 else:
-                    # Fallback : distance euclidienne approximative
-                    matrix[i][j] = self._euclidean_distance_approx(origin, destination)
+                    # Fallback : distance grand-cercle précalculée
+                    if haversine_m is None:
+                        haversine_m = self._haversine_matrix(locations)
+                    matrix[i][j] = haversine_m[i, j]
                     matrix[j][i] = matrix[i][j]
                 
                 calls_made += 1
@@ -201,50 +319,212 @@ class RouteOptimizer:
                     logger.debug("   📊 %s/%s distances calculées", calls_made, total_calls)
         
         return matrix
-    
-    def _distance_matrix_to_binary(self, distance_matrix: List[List[float]]) -> List[List[int]]:
+
+    @staticmethod
+    def _points_coords(points: List[Dict[str, Any]]) -> "np.ndarray":
         """
-        🔢 Convertit la matrice de distances en matrice binaire (1 si ≤20min, 0 sinon)
+        📍 Coordonnées d'une liste de points de tour en tableau (n, 2).
         """
-        n = len(distance_matrix)
-        binary_matrix = [[0] * n for _ in range(n)]
-        
-        for i in range(n):
-            for j in range(n):
-                if i == j:
-                    binary_matrix[i][j] = 1  # Un point est connecté à lui-même
-                elif distance_matrix[i][j] <= self.max_walking_distance:
-                    binary_matrix[i][j] = 1
-                else:
-                    binary_matrix[i][j] = 0
-        
-        return binary_matrix
+        return np.asarray(
+            [[p["location"]["lat"], p["location"]["lng"]] for p in points],
+            dtype=np.float64,
+        )
+
+    @staticmethod
+    def _haversine_cross(coords1: "np.ndarray", coords2: "np.ndarray") -> "np.ndarray":
+        """
+        🌍 Distances grand-cercle croisées (m1, m2) entre deux jeux de points.
+        """
+        lat1 = np.radians(coords1[:, 0])[:, None]
+        lng1 = np.radians(coords1[:, 1])[:, None]
+        lat2 = np.radians(coords2[:, 0])[None, :]
+        lng2 = np.radians(coords2[:, 1])[None, :]
+        a = (
+            np.sin((lat2 - lat1) / 2) ** 2
+            + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        )
+        return 2 * 6371000.0 * np.arcsin(np.sqrt(a))
+
+    @staticmethod
+    def _haversine_m_scalar(loc1: Dict[str, float], loc2: Dict[str, float]) -> float:
+        """
+        🌍 Distance grand-cercle (mètres) entre deux points.
+        """
+        lat1 = math.radians(loc1["lat"])
+        lat2 = math.radians(loc2["lat"])
+        dlat = lat2 - lat1
+        dlng = math.radians(loc2["lng"] - loc1["lng"])
+        a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng / 2) ** 2
+        return 2 * 6371000.0 * math.asin(math.sqrt(a))
+
+    @staticmethod
+    def _haversine_matrix(locations: List[Dict[str, float]]) -> "np.ndarray":
+        """
+        🌍 Matrice complète des distances grand-cercle (mètres) : trigo
+        vectorisée, zéro appel Python par paire.
+        """
+        coords = np.asarray(
+            [[loc["lat"], loc["lng"]] for loc in locations], dtype=np.float64
+        )
+        lat = np.radians(coords[:, 0])
+        lng = np.radians(coords[:, 1])
+        dlat = lat[:, None] - lat[None, :]
+        dlng = lng[:, None] - lng[None, :]
+        a = (
+            np.sin(dlat / 2) ** 2
+            + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin(dlng / 2) ** 2
+        )
+        return 2 * 6371000.0 * np.arcsin(np.sqrt(a))
+
+    def _fetch_distance_matrix_batched(self, locations: List[Dict[str, float]]) -> Optional[List[List[Optional[int]]]]:
+        """
+        📡 Récupère les distances piétonnes via l'API Distance Matrix par
+        blocs de 10×10 (quota du service : origines × destinations ≤ 100
+        éléments par requête). Les blocs sous la diagonale sont sautés (la
+        marche est symétrique) et un bloc en échec laisse simplement ses
+        paires à None pour le repli de l'appelant ; None n'est retourné que
+        si AUCUN bloc n'aboutit.
+        """
+        n = len(locations)
+        if n < 2:
+            return [[None] * n for _ in range(n)]
+
+        result: List[List[Optional[int]]] = [[None] * n for _ in range(n)]
+        chunk = 10  # 10 origines × 10 destinations = 100 éléments (quota API)
+        blocks_ok = 0
+
+        for i0 in range(0, n, chunk):
+            origins = locations[i0:i0 + chunk]
+            origins_param = "|".join(f"{loc['lat']},{loc['lng']}" for loc in origins)
+
+            for j0 in range(0, n, chunk):
+                # Bloc entièrement sous la diagonale : couvert par son miroir
+                if j0 + chunk <= i0:
+                    continue
+
+                destinations = locations[j0:j0 + chunk]
+                destinations_param = "|".join(f"{loc['lat']},{loc['lng']}" for loc in destinations)
+
+                try:
+                    params = {
+                        "origins": origins_param,
+                        "destinations": destinations_param,
+                        "mode": "walking",
+                        "units": "metric",
+                        "key": self.google_api_key
+                    }
+                    response = self._http.get(self.distance_matrix_base_url, params=params, timeout=15)
+                    if response.status_code != 200:
+                        continue
+
+                    data = response.json()
+                    if data.get("status") != "OK":
+                        if VERBOSE_LOGS:
+                            logger.debug("⚠️ Bloc Distance Matrix refusé: %s", data.get("status"))
+                        continue
+
+                    rows = data.get("rows") or []
+                    for di, row in enumerate(rows):
+                        for dj, element in enumerate(row.get("elements", [])):
+                            if element.get("status") == "OK":
+                                distance = element.get("distance", {}).get("value")
+                                if distance is not None:
+                                    result[i0 + di][j0 + dj] = distance
+                                    self._store_cached_distance(
+                                        origins[di], destinations[dj], distance
+                                    )
+                    blocks_ok += 1
+
+                except Exception as e:
+                    if VERBOSE_LOGS:
+                        logger.debug("⚠️ Erreur API Distance Matrix: %s", e)
+
+        if blocks_ok == 0:
+            return None
+
+        if VERBOSE_LOGS:
+            logger.debug("   📊 Matrice %sx%s récupérée en mode batch (%s blocs)", n, n, blocks_ok)
+        return result
+
+    def _fetch_distances_parallel(self, pairs: List[Tuple[Dict[str, float], Dict[str, float]]], max_workers: int = 16):
+        """
+        ⚡ Résout en parallèle les paires absentes du cache de distances.
+        Le GIL est relâché pendant les requêtes HTTP : le fan-out est quasi
+        linéaire jusqu'à max_workers.
+        """
+        uncached = []
+        seen_keys = set()
+        for origin, destination in pairs:
+            key = self._distance_cache_key(origin, destination)
+            if key in self.distance_cache or key in seen_keys:
+                continue
+            seen_keys.add(key)
+            uncached.append((origin, destination))
+
+        if not uncached:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(uncached))) as executor:
+            list(executor.map(
+                lambda pair: self._get_walking_distance_cached(*pair),
+                uncached,
+            ))
+
+    def _store_cached_distance(self, origin: Dict[str, float], destination: Dict[str, float], distance: int):
+        """
+        💾 Alimente le cache de distances (clé canonique, valable dans les
+        deux sens — la marche est traitée comme symétrique, premier arrivé
+        fait foi pour une paire donnée).
+        """
+        key = self._distance_cache_key(origin, destination)
+        if key in self.distance_cache:
+            # Élément miroir d'un batch déjà enregistré : ni réécriture
+            # mémoire ni INSERT SQLite supplémentaire
+            return
+        self.distance_cache[key] = distance
+        self._db_put_distance(key, distance)
     
-    def _connected_components_clustering(self, adjacency_matrix: List[List[int]], 
+    def _connected_components_clustering(self, neighbors: List["np.ndarray"], 
                                        attractions: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
         """
-        🔗 Clustering par composantes connexes
+        🔗 Clustering par composantes connexes sur listes d'adjacence
         """
         n = len(attractions)
-        visited = [False] * n
+        visited = np.zeros(n, dtype=np.uint8)
         clusters = []
-        
-        def dfs(node: int, cluster: List[int]):
-            visited[node] = True
-            cluster.append(node)
-            
-            for neighbor in range(n):
-                if adjacency_matrix[node][neighbor] and not visited[neighbor]:
-                    dfs(neighbor, cluster)
-        
+        index_clusters = []
+
+        # DFS itératif sur pile : pas de récursion Python (ni de
+        # RecursionError sur les grandes villes), visited en uint8 compact
+        covered = 0
         for i in range(n):
-            if not visited[i]:
-                cluster_indices = []
-                dfs(i, cluster_indices)
-                
-                cluster_attractions = [attractions[idx] for idx in cluster_indices]
-                clusters.append(cluster_attractions)
-        
+            if visited[i]:
+                continue
+
+            # Indices en array('i') : stockage primitif contigu, ~8x plus
+            # compact que des listes d'int boxés sur les grandes composantes
+            cluster_indices = array('i')
+            stack = [i]
+            while stack:
+                node = stack.pop()
+                if visited[node]:
+                    continue
+                visited[node] = 1
+                cluster_indices.append(node)
+                node_neighbors = neighbors[node]
+                stack.extend(node_neighbors[visited[node_neighbors] == 0].tolist())
+
+            cluster_attractions = [attractions[idx] for idx in cluster_indices]
+            clusters.append(cluster_attractions)
+            index_clusters.append(list(cluster_indices))
+
+            # Sortie anticipée : tous les POIs sont déjà couverts, inutile
+            # de re-balayer les nœuds restants (tous visités)
+            covered += len(cluster_indices)
+            if covered == n:
+                break
+
+        self._cluster_index_lists = index_clusters
         return clusters
     
     def _split_large_cluster(self, cluster: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
@@ -273,56 +553,34 @@ class RouteOptimizer:
         """
         if k >= len(cluster):
             return [[attr] for attr in cluster]
-        
-        # Initialisation aléatoire des centroïdes
-        n_points = len(coordinates)
-        centroids = []
-        
+
+        coords = np.asarray(coordinates, dtype=np.float32)
+        n_points = len(coords)
+
         # Choisir k points aléatoires comme centroïdes initiaux
         random.seed(42)  # Pour la reproductibilité
         centroid_indices = random.sample(range(n_points), k)
-        for idx in centroid_indices:
-            centroids.append(coordinates[idx][:])
-        
-        # Algorithme K-means simplifié (max 10 itérations)
+        centroids = coords[centroid_indices].copy()
+
+        # Algorithme K-means simplifié (max 10 itérations) : affectation et
+        # recalcul des centroïdes en broadcast NumPy plutôt qu'en boucles
+        assignments = np.zeros(n_points, dtype=np.intp)
         for iteration in range(10):
             # Assigner chaque point au centroïde le plus proche
-            assignments = []
-            for coord in coordinates:
-                closest_centroid = 0
-                min_distance = float('inf')
-                
-                for i, centroid in enumerate(centroids):
-                    distance = self._euclidean_distance_coords(coord, centroid)
-                    if distance < min_distance:
-                        min_distance = distance
-                        closest_centroid = i
-                
-                assignments.append(closest_centroid)
-            
-            # Recalculer les centroïdes
-            new_centroids = []
+            squared_distances = ((coords[:, None, :] - centroids[None, :, :]) ** 2).sum(-1)
+            assignments = squared_distances.argmin(1)
+
+            # Recalculer les centroïdes (l'ancien est gardé si cluster vide)
+            new_centroids = centroids.copy()
             for i in range(k):
-                cluster_coords = [coordinates[j] for j in range(len(coordinates)) if assignments[j] == i]
-                
-                if cluster_coords:
-                    # Moyenne des coordonnées du cluster
-                    avg_lat = sum(coord[0] for coord in cluster_coords) / len(cluster_coords)
-                    avg_lng = sum(coord[1] for coord in cluster_coords) / len(cluster_coords)
-                    new_centroids.append([avg_lat, avg_lng])
-                else:
-                    # Garder l'ancien centroïde si pas de points assignés
-                    new_centroids.append(centroids[i])
-            
+                members = coords[assignments == i]
+                if len(members):
+                    new_centroids[i] = members.mean(0)
+
             # Vérifier la convergence
-            converged = True
-            for i in range(k):
-                if self._euclidean_distance_coords(centroids[i], new_centroids[i]) > 0.0001:
-                    converged = False
-                    break
-            
+            converged = bool(np.max(np.linalg.norm(new_centroids - centroids, axis=1)) <= 0.0001)
             centroids = new_centroids
-            
+
             if converged:
                 break
         
@@ -338,9 +596,10 @@ class RouteOptimizer:
         """
         📏 Distance euclidienne entre deux coordonnées
         """
-        return math.sqrt((coord1[0] - coord2[0])**2 + (coord1[1] - coord2[1])**2)
+        return math.hypot(coord1[0] - coord2[0], coord1[1] - coord2[1])
     
-    def _optimize_cluster(self, cluster: List[Dict[str, Any]], cluster_id: int, global_index_start: int = 0) -> Dict[str, Any]:
+    def _optimize_cluster(self, cluster: List[Dict[str, Any]], cluster_id: int, global_index_start: int = 0,
+                          global_indices: Optional[List[int]] = None) -> Dict[str, Any]:
         """
         🎯 Optimise un cluster individuellement avec TSP local
         """
@@ -366,8 +625,13 @@ class RouteOptimizer:
                 }
             }
         
-        # TSP local pour ce cluster
-        distances = self._build_distance_matrix_for_cluster(cluster)
+        # TSP local pour ce cluster : tranche de la matrice globale quand le
+        # cluster en est issu, sinon reconstruction à la demande
+        if global_indices is not None and self._global_dist is not None:
+            idx = np.asarray(global_indices)
+            distances = self._global_dist[np.ix_(idx, idx)].astype(np.int32)
+        else:
+            distances = self._build_distance_matrix_for_cluster(cluster)
         
         # Trouver le point de départ optimal (le plus excentré du cluster)
         start_idx = self._find_cluster_start_point(cluster)
@@ -388,7 +652,7 @@ class RouteOptimizer:
                 time_from_previous = 0
             else:
                 prev_idx = improved_path[i-1]
-                distance_from_previous = distances[prev_idx][cluster_idx]
+                distance_from_previous = int(distances[prev_idx][cluster_idx])
                 time_from_previous = self._distance_to_walking_minutes(distance_from_previous)
                 total_walking_time += time_from_previous
             
@@ -447,12 +711,20 @@ class RouteOptimizer:
         for i, tour in enumerate(optimized_tours):
             cluster = clusters[i]
             
-            # Variante Express (3-4 top POIs)
-            top_points = sorted(
-                tour["points"],
-                key=lambda x: x.get("rating") if x.get("rating") is not None else 0,
-                reverse=True
-            )[:4]
+            # Variante Express (3-4 top POIs) : sélection partielle O(n)
+            # plutôt qu'un tri complet
+            ratings = np.fromiter(
+                (p.get("rating") or 0.0 for p in tour["points"]),
+                dtype=np.float32,
+                count=len(tour["points"]),
+            )
+            k = min(4, len(ratings))
+            if k < len(ratings):
+                top_idx = np.argpartition(-ratings, k - 1)[:k]
+            else:
+                top_idx = np.arange(len(ratings))
+            top_idx = top_idx[np.argsort(-ratings[top_idx], kind="stable")]
+            top_points = [tour["points"][i] for i in top_idx]
             if len(top_points) >= 2:
                 variants["express"].append({
                     "cluster_id": tour["cluster_id"],
@@ -464,10 +736,10 @@ class RouteOptimizer:
             # Variantes thématiques
             self._add_thematic_variants(variants["thematic"], cluster, i+1)
             
-            # Variante Découverte (inclut POIs moins connus)
+            # Variante Découverte (inclut POIs moins connus) : réutilise le
+            # tableau de notes déjà extrait pour la variante express
             discovery_points = [
-                p for p in tour["points"]
-                if (p.get("rating") if p.get("rating") is not None else 0) < 4.2
+                tour["points"][idx] for idx in np.flatnonzero(ratings < 4.2)
             ]
             if len(discovery_points) >= 2:
                 variants["discovery"].append({
@@ -531,65 +803,115 @@ class RouteOptimizer:
             return tours
         
         logger.debug("   🔍 Analyse avancée de %s tours pour fusion...", len(tours))
-        
-        # Continuer à fusionner tant que possible
-        merged = True
-        current_tours = tours[:]
-        
-        while merged and len(current_tours) > 1:
-            merged = False
-            
-            # Calculer toutes les distances entre tours
-            merge_candidates = []
-            
-            for i in range(len(current_tours)):
-                for j in range(i + 1, len(current_tours)):
-                    tour1 = current_tours[i]
-                    tour2 = current_tours[j]
-                    
-                    # Calculer TOUTES les connexions possibles
-                    connections = self._find_all_connection_points(tour1, tour2)
-                    
-                    if connections:
-                        best_connection = min(connections, key=lambda x: x['walking_minutes'])
-                        
-                        # Utiliser les vrais temps de marche Google (limite stricte de 18 minutes)
-                        max_walking_minutes_limit = 18  # Limite stricte : pas plus de 18 minutes de marche
-                        
-                        if best_connection['walking_minutes'] <= max_walking_minutes_limit:
-                            merge_candidates.append({
-                                'tour1_idx': i,
-                                'tour2_idx': j,
-                                'connection': best_connection,
-                                'priority': best_connection['walking_minutes']  # Priorité basée sur le vrai temps de marche
-                            })
-            
-            # Fusionner le meilleur candidat
-            if merge_candidates:
-                # Trier par priorité (temps de marche réel, le plus court d'abord)
-                merge_candidates.sort(key=lambda x: x['priority'])
-                best_merge = merge_candidates[0]
-                
-                # Effectuer la fusion
-                merged_tour = self._merge_tours_at_connection(
-                    current_tours[best_merge['tour1_idx']],
-                    current_tours[best_merge['tour2_idx']],
-                    best_merge['connection']
+
+        # Utiliser les vrais temps de marche Google (limite stricte de 18 minutes)
+        max_walking_minutes_limit = 18  # Limite stricte : pas plus de 18 minutes de marche
+
+        # File de priorité des candidats : plus de tri complet recalculé à
+        # chaque fusion, les entrées périmées sont invalidées par version
+        current_tours: List[Optional[Dict[str, Any]]] = list(tours)
+        versions = [0] * len(current_tours)
+        heap: List[tuple] = []
+
+        def push_pair(i: int, j: int):
+            best = self._best_connection(
+                current_tours[i], current_tours[j], max_walking_minutes_limit
+            )
+            if best and best['walking_minutes'] <= max_walking_minutes_limit:
+                heapq.heappush(
+                    heap,
+                    (best['walking_minutes'], versions[i], versions[j], i, j, best),
                 )
-                
-                # Remplacer les tours fusionnés
-                new_tours = []
-                for idx, tour in enumerate(current_tours):
-                    if idx != best_merge['tour1_idx'] and idx != best_merge['tour2_idx']:
-                        new_tours.append(tour)
-                new_tours.append(merged_tour)
-                
-                current_tours = new_tours
-                merged = True
-                
-                logger.debug("   ✅ Fusion réussie : %s tours restants", len(current_tours))
-        
-        return current_tours
+
+        for i in range(len(current_tours)):
+            for j in range(i + 1, len(current_tours)):
+                push_pair(i, j)
+
+        alive = len(current_tours)
+        while heap and alive > 1:
+            minutes, vi, vj, i, j, connection = heapq.heappop(heap)
+
+            # Entrée périmée : un des deux tours a déjà été fusionné
+            if (
+                current_tours[i] is None
+                or current_tours[j] is None
+                or versions[i] != vi
+                or versions[j] != vj
+            ):
+                continue
+
+            merged_tour = self._merge_tours_at_connection(
+                current_tours[i], current_tours[j], connection
+            )
+
+            current_tours[i] = None
+            current_tours[j] = None
+            versions[i] += 1
+            versions[j] += 1
+
+            current_tours.append(merged_tour)
+            versions.append(0)
+            new_idx = len(current_tours) - 1
+            alive -= 1
+
+            for k in range(new_idx):
+                if current_tours[k] is not None:
+                    push_pair(k, new_idx)
+
+            logger.debug("   ✅ Fusion réussie : %s tours restants", alive)
+
+        original_count = len(tours)
+        final_tours = []
+        for idx, tour in enumerate(current_tours):
+            if tour is None:
+                continue
+
+            # Passe Google unique sur les tours issus d'une fusion (les tours
+            # intacts ont déjà été réordonnés dans _optimize_cluster)
+            if idx >= original_count:
+                google_optimized = self._optimize_with_google_directions(tour['points'])
+                if google_optimized:
+                    tour['points'] = google_optimized["points"]
+                    tour['stats'] = {
+                        'total_distance': google_optimized["total_distance"],
+                        'estimated_walking_time': google_optimized["estimated_walking_time"],
+                        'points_count': len(google_optimized["points"])
+                    }
+                    logger.info(
+                        "🧭 Google Directions a réordonné un tour fusionné (%s points)",
+                        len(tour['points'])
+                    )
+
+            final_tours.append(tour)
+
+        return final_tours
+
+    def _best_connection(self, tour1: Dict, tour2: Dict, max_walking_minutes_limit: int) -> Optional[Dict]:
+        """
+        🔗 Meilleure connexion entre deux tours : extrémités d'abord, scan
+        complet seulement quand une jonction interne peut encore qualifier.
+        """
+        # La fusion choisit presque toujours une jonction entre
+        # extrémités : tester d'abord les 4 combinaisons (O(1))
+        connections = self._endpoint_connections(tour1, tour2)
+        best_connection = (
+            min(connections, key=lambda x: x['walking_minutes'])
+            if connections else None
+        )
+
+        # Extrémités presque à portée : chercher une connexion
+        # interne avec le scan complet (O(m1·m2))
+        if (
+            best_connection is not None
+            and max_walking_minutes_limit
+            < best_connection['walking_minutes']
+            <= max_walking_minutes_limit * 2
+        ):
+            connections = self._find_all_connection_points(tour1, tour2)
+            if connections:
+                best_connection = min(connections, key=lambda x: x['walking_minutes'])
+
+        return best_connection
     
     def _find_all_connection_points(self, tour1: Dict, tour2: Dict) -> List[Dict]:
         """
@@ -601,38 +923,78 @@ class RouteOptimizer:
         
         if not points1 or not points2:
             return connections
-        
-        # Tester toutes les combinaisons
-        for i, p1 in enumerate(points1):
-            for j, p2 in enumerate(points2):
-                loc1 = p1['location']
-                loc2 = p2['location']
-                
-                distance = self._get_walking_distance_cached(loc1, loc2)
-                if distance is None:
-                    distance = self._euclidean_distance_approx(loc1, loc2)
-                
-                connections.append({
-                    'tour1_point_idx': i,
-                    'tour2_point_idx': j,
-                    'tour1_point': p1,
-                    'tour2_point': p2,
-                    'distance': distance,
-                    'walking_minutes': self._distance_to_walking_minutes(distance),
-                    'connection_type': self._determine_connection_type(i, j, len(points1), len(points2))
-                })
+
+        # Écran spatial : écarter sans aucun lookup les paires dont la
+        # distance à vol d'oiseau dépasse déjà la contrainte (marge 1.3x
+        # pour couvrir le détour piéton par rapport au grand cercle).
+        # SoA : les coordonnées des deux tours passent en tableaux (m, 2)
+        # et l'écran se calcule en un seul broadcast
+        screen_limit = self.max_walking_distance * 1.3
+        coords1 = self._points_coords(points1)
+        coords2 = self._points_coords(points2)
+        screen = self._haversine_cross(coords1, coords2) <= screen_limit
+        candidate_pairs = [(int(i), int(j)) for i, j in np.argwhere(screen)]
+
+        if not candidate_pairs:
+            return connections
+
+        # Précharger en parallèle les distances absentes du cache : la
+        # boucle ci-dessous ne fait plus que des lookups locaux
+        self._fetch_distances_parallel([
+            (points1[i]['location'], points2[j]['location'])
+            for i, j in candidate_pairs
+        ])
+
+        for i, j in candidate_pairs:
+            connections.append(
+                self._build_connection(i, j, points1[i], points2[j], len(points1), len(points2))
+            )
         
         return connections
-    
-    def _determine_connection_type(self, idx1: int, idx2: int, len1: int, len2: int) -> str:
+
+    def _endpoint_connections(self, tour1: Dict, tour2: Dict) -> List[Dict]:
         """
-        🏷️ Détermine le type de connexion (début-début, fin-fin, etc.)
+        🔗 Connexions candidates limitées aux extrémités des deux tours
+        (4 combinaisons au plus, contre m1·m2 pour le scan complet)
         """
-        is_start1 = idx1 == 0
-        is_end1 = idx1 == len1 - 1
-        is_start2 = idx2 == 0
-        is_end2 = idx2 == len2 - 1
-        
+        connections = []
+        points1 = tour1.get('points', [])
+        points2 = tour2.get('points', [])
+
+        if not points1 or not points2:
+            return connections
+
+        for i in dict.fromkeys((0, len(points1) - 1)):
+            for j in dict.fromkeys((0, len(points2) - 1)):
+                connections.append(
+                    self._build_connection(i, j, points1[i], points2[j], len(points1), len(points2))
+                )
+
+        return connections
+
+    def _build_connection(self, i: int, j: int, p1: Dict, p2: Dict, len1: int, len2: int) -> Dict:
+        """
+        🔗 Construit une entrée de connexion entre deux points de tours
+        """
+        loc1 = p1['location']
+        loc2 = p2['location']
+
+        distance = self._get_walking_distance_cached(loc1, loc2)
+        if distance is None:
+            distance = self._euclidean_distance_approx(loc1, loc2)
+
+        return {
+            'tour1_point_idx': i,
+            'tour2_point_idx': j,
+            'tour1_point': p1,
+            'tour2_point': p2,
+            'distance': distance,
+            'walking_minutes': self._distance_to_walking_minutes(distance),
+            'connection_type': self._determine_connection_type(i, j, len1, len2)
+        }
+    
+    @staticmethod
+    def _classify_connection(is_start1: bool, is_end1: bool, is_start2: bool, is_end2: bool) -> str:
         if is_end1 and is_start2:
             return "end1_to_start2"  # Connexion idéale !
         elif is_end2 and is_start1:
@@ -643,6 +1005,17 @@ class RouteOptimizer:
             return "end_to_end"  # Nécessite inversion d'un tour
         else:
             return "middle"  # Connexion au milieu, plus complexe
+
+    def _determine_connection_type(self, idx1: int, idx2: int, len1: int, len2: int) -> str:
+        """
+        🏷️ Détermine le type de connexion (début-début, fin-fin, etc.)
+        """
+        return _CONNECTION_TYPE_LOOKUP[(
+            idx1 == 0,
+            idx1 == len1 - 1,
+            idx2 == 0,
+            idx2 == len2 - 1,
+        )]
     
     def _merge_tours_at_connection(self, tour1: Dict, tour2: Dict, connection: Dict) -> Dict:
         """
@@ -705,15 +1078,9 @@ class RouteOptimizer:
         total_distance = sum(p.get('distance_from_previous', 0) for p in merged_points)
         total_time = sum(p.get('walking_time_from_previous', 0) for p in merged_points)
 
-        google_optimized = self._optimize_with_google_directions(merged_points)
-        if google_optimized:
-            merged_points = google_optimized["points"]
-            total_distance = google_optimized["total_distance"]
-            total_time = google_optimized["estimated_walking_time"]
-            logger.info(
-                "🧭 Google Directions a réordonné un tour fusionné (%s points)",
-                len(merged_points)
-            )
+        # Pas de réordonnancement Google ici : une fusion en chaîne paierait
+        # un aller-retour par étape ; la passe finale de
+        # _post_merge_nearby_tours s'en charge une seule fois par tour
         
         return {
             'cluster_id': tour1.get('cluster_id', 1),
@@ -733,7 +1100,13 @@ class RouteOptimizer:
         n = len(points)
         if n <= 3:
             return points
-        
+
+        # Matrice locale construite une seule fois : chaque test de gain
+        # devient une différence de 4 arêtes indexées directement, sans
+        # construction de clé de cache ni lookup réseau par comparaison
+        distances = self._location_distance_matrix([p['location'] for p in points])
+        order = list(range(n))
+
         improved = True
         max_iterations = 10  # Limiter pour la performance
         iteration = 0
@@ -748,49 +1121,36 @@ class RouteOptimizer:
                         continue
                     
                     # Calculer le gain de l'inversion
-                    gain = self._calculate_2opt_gain(points, i, j)
+                    gain = self._calculate_2opt_gain(order, distances, i, j)
                     
                     if gain > 0:
                         # Inverser le segment
-                        points[i:j] = points[i:j][::-1]
+                        order[i:j] = order[i:j][::-1]
                         improved = True
                         break
                 
                 if improved:
                     break
-        
-        # Recalculer les distances
-        for i in range(1, len(points)):
-            loc1 = points[i-1]['location']
-            loc2 = points[i]['location']
-            
-            distance = self._get_walking_distance_cached(loc1, loc2)
-            if distance is None:
-                distance = int(self._euclidean_distance_approx(loc1, loc2))
-            
+
+        points = [points[idx] for idx in order]
+
+        # Recalculer les distances depuis la matrice locale
+        for i in range(1, n):
+            distance = int(distances[order[i-1], order[i]])
             points[i]['distance_from_previous'] = distance
             points[i]['walking_time_from_previous'] = self._distance_to_walking_minutes(distance)
         
         return points
     
-    def _calculate_2opt_gain(self, points: List[Dict], i: int, j: int) -> float:
+    @staticmethod
+    def _calculate_2opt_gain(order: List[int], distances: "np.ndarray", i: int, j: int) -> float:
         """
-        📊 Calcule le gain d'une inversion 2-opt
+        📊 Calcule le gain d'une inversion 2-opt (4 arêtes touchées, O(1))
         """
-        # Distance actuelle
-        current = 0
-        if i > 0:
-            current += self._point_distance(points[i-1], points[i])
-        if j < len(points):
-            current += self._point_distance(points[j-1], points[j % len(points)])
-        
-        # Distance après inversion
-        new = 0
-        if i > 0:
-            new += self._point_distance(points[i-1], points[j-1])
-        if j < len(points):
-            new += self._point_distance(points[i], points[j % len(points)])
-        
+        a, b = order[i - 1], order[i]
+        c, d = order[j - 1], order[j % len(order)]
+        current = int(distances[a, b]) + int(distances[c, d])
+        new = int(distances[a, c]) + int(distances[b, d])
         return current - new
     
     def _point_distance(self, p1: Dict, p2: Dict) -> float:
@@ -799,6 +1159,13 @@ class RouteOptimizer:
         """
         loc1 = p1['location']
         loc2 = p2['location']
+
+        # Fast-path : après préchauffage des matrices, la quasi-totalité des
+        # appels est un hit — un get() direct évite de traverser tout le
+        # chemin cache persistant + API
+        cached = self.distance_cache.get(self._distance_cache_key(loc1, loc2))
+        if cached is not None:
+            return cached
         
         distance = self._get_walking_distance_cached(loc1, loc2)
         if distance is None:
@@ -816,11 +1183,58 @@ class RouteOptimizer:
         
         isolated_point = isolated_tour['points'][0]
         isolated_location = isolated_point['location']
-        
+
+        # KD-tree sur l'ensemble des points cibles : O(log n) par requête au
+        # lieu d'un balayage complet ; seuls les quelques candidats les plus
+        # proches géométriquement paient une vraie distance piétonne
+        if cKDTree is not None:
+            flat_points = [
+                (tour, point)
+                for tour in target_tours
+                for point in tour.get('points', [])
+            ]
+            if len(flat_points) >= 8:
+                cos_mid = math.cos(math.radians(isolated_location['lat']))
+                target_xy = np.asarray([
+                    [p['location']['lat'] * 111_000,
+                     p['location']['lng'] * 111_000 * cos_mid]
+                    for _, p in flat_points
+                ])
+                tree = cKDTree(target_xy)
+                query_xy = [
+                    isolated_location['lat'] * 111_000,
+                    isolated_location['lng'] * 111_000 * cos_mid,
+                ]
+                k = min(5, len(flat_points))
+                _, nearest_idxs = tree.query(query_xy, k=k)
+
+                best_target = None
+                best_distance = float('inf')
+                for idx in np.atleast_1d(nearest_idxs):
+                    candidate_tour, candidate_point = flat_points[int(idx)]
+                    distance = self._point_distance(isolated_point, candidate_point)
+                    if distance < best_distance:
+                        best_distance = distance
+                        best_target = candidate_tour
+
+                if best_target:
+                    return (
+                        best_target,
+                        best_distance,
+                        self._distance_to_walking_minutes(best_distance),
+                    )
+                return None
+
         best_target = None
         best_distance = float('inf')
         best_minutes = float('inf')
         
+        # Alias locaux : LOAD_FAST au lieu d'un lookup d'attribut par point
+        cache_get = self.distance_cache.get
+        cache_key = self._distance_cache_key
+        fetch_distance = self._get_walking_distance_cached
+        euclid = self._euclidean_distance_approx
+
         for target_tour in target_tours:
             target_points = target_tour.get('points', [])
             if not target_points:
@@ -831,10 +1245,12 @@ class RouteOptimizer:
             
             for target_point in target_points:
                 target_location = target_point['location']
-                distance = self._get_walking_distance_cached(isolated_location, target_location)
+                distance = cache_get(cache_key(isolated_location, target_location))
+                if distance is None:
+                    distance = fetch_distance(isolated_location, target_location)
                 
                 if distance is None:
-                    distance = self._euclidean_distance_approx(isolated_location, target_location)
+                    distance = euclid(isolated_location, target_location)
                 
                 if distance < min_distance_to_target:
                     min_distance_to_target = distance
@@ -881,21 +1297,8 @@ class RouteOptimizer:
         if len(points) <= 2:
             return points
         
-        # Construire matrice de distances pour ces points
-        n = len(points)
-        distances = [[0] * n for _ in range(n)]
-        
-        for i in range(n):
-            for j in range(i + 1, n):
-                loc1 = points[i]['location']
-                loc2 = points[j]['location']
-                
-                distance = self._get_walking_distance_cached(loc1, loc2)
-                if distance is None:
-                    distance = int(self._euclidean_distance_approx(loc1, loc2))
-                
-                distances[i][j] = distance
-                distances[j][i] = distance
+        # Construire matrice de distances pour ces points (repli vectorisé)
+        distances = self._location_distance_matrix([p['location'] for p in points])
         
         # TSP simple avec nearest neighbor + 2-opt
         path, _ = self._nearest_neighbor_from_start(0, distances)
@@ -913,7 +1316,7 @@ class RouteOptimizer:
                 point['walking_time_from_previous'] = 0
             else:
                 prev_point_idx = improved_path[i-1]
-                distance = distances[prev_point_idx][point_idx]
+                distance = int(distances[prev_point_idx][point_idx])
                 point['distance_from_previous'] = distance
                 point['walking_time_from_previous'] = self._distance_to_walking_minutes(distance)
             
@@ -961,12 +1364,14 @@ class RouteOptimizer:
             return tours
 
         logger.info("🔎 Vérification des doublons d'attractions entre tours...")
-        # Prioriser les tours avec le plus de points (puis ordre initial)
-        order = sorted(
-            enumerate(tours),
-            key=lambda item: len(item[1].get('points') or []),
-            reverse=True
+        # Prioriser les tours avec le plus de points (puis ordre initial) :
+        # argsort stable sur un tableau de longueurs, sans lambda par élément
+        lengths = np.fromiter(
+            (len(tour.get('points') or []) for tour in tours),
+            dtype=np.int32,
+            count=len(tours),
         )
+        order = [(int(idx), tours[int(idx)]) for idx in np.argsort(-lengths, kind="stable")]
 
         seen_place_ids = set()
         duplicates_removed = 0
@@ -977,23 +1382,31 @@ class RouteOptimizer:
                 continue
 
             filtered_points = []
-            for point in points:
+            removed_positions = []
+            for position, point in enumerate(points):
                 place_id = point.get('place_id')
                 if place_id and place_id in seen_place_ids:
                     duplicates_removed += 1
+                    removed_positions.append(position)
                     continue
                 if place_id:
                     seen_place_ids.add(place_id)
                 filtered_points.append(point)
 
-            if len(filtered_points) != len(points):
-                if len(filtered_points) > 1:
-                    tour['points'] = self._reoptimize_merged_tour_points(filtered_points)
-                else:
-                    # Un seul point ou vidé
-                    tour['points'] = filtered_points
+            if not removed_positions:
+                continue
 
-                self._recalculate_tour_stats(tour)
+            # Un retrait limité à un bloc final ne change pas l'ordre des
+            # points restants : pas besoin de repayer le TSP (ni les appels
+            # Google qu'il implique), les statistiques suffisent
+            trailing_only = removed_positions[0] == len(filtered_points)
+
+            if len(filtered_points) > 1 and not trailing_only:
+                tour['points'] = self._reoptimize_merged_tour_points(filtered_points)
+            else:
+                tour['points'] = filtered_points
+
+            self._recalculate_tour_stats(tour)
 
         # Supprimer les tours désormais vides
         cleaned_tours = [tour for tour in tours if tour.get('points')]
@@ -1052,15 +1465,93 @@ class RouteOptimizer:
                 seen_coordinates[coord_key] = {"name": point.get('name'), "tour_label": tour_label}
     
     # === MÉTHODES UTILITAIRES ===
-    
+
+    def _init_distance_db(self) -> Optional["sqlite3.Connection"]:
+        """
+        🗄️ Ouvre (ou crée) la base SQLite du cache de distances persistant.
+        """
+        db_path = os.getenv(
+            "ROUTE_DISTANCE_CACHE_DB", os.path.join(".cache", "route_distances.sqlite")
+        )
+        try:
+            db_dir = os.path.dirname(os.path.abspath(db_path))
+            os.makedirs(db_dir, exist_ok=True)
+            db = sqlite3.connect(db_path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS walking_distances ("
+                "pair_key TEXT PRIMARY KEY, distance_m REAL, ts REAL)"
+            )
+            db.commit()
+            return db
+        except Exception as e:
+            logger.warning("⚠️ Cache de distances persistant indisponible: %s", e)
+            return None
+
+    def _db_get_distance(self, cache_key: tuple) -> Optional[int]:
+        if not self._distance_db:
+            return None
+        try:
+            with self._db_lock:
+                row = self._distance_db.execute(
+                    "SELECT distance_m, ts FROM walking_distances WHERE pair_key = ?",
+                    (self._db_key(cache_key),),
+                ).fetchone()
+        except Exception:
+            return None
+        if not row:
+            return None
+        distance, ts = row
+        if time.time() - ts > self.DISTANCE_CACHE_TTL:
+            return None
+        return int(distance)
+
+    def _db_put_distance(self, cache_key: tuple, distance: float):
+        if not self._distance_db:
+            return
+        try:
+            with self._db_lock:
+                self._distance_db.execute(
+                    "INSERT OR REPLACE INTO walking_distances VALUES (?, ?, ?)",
+                    (self._db_key(cache_key), distance, time.time()),
+                )
+                self._distance_db.commit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _distance_cache_key(origin: Dict[str, float], destination: Dict[str, float]) -> tuple:
+        """
+        🔑 Clé de cache canonique : coordonnées arrondies au micro-degré
+        (robuste au bruit flottant) et paire ordonnée — A→B et B→A
+        partagent la même entrée, la marche étant traitée comme symétrique.
+        Tuple de floats : hachage bien plus rapide qu'une chaîne formatée.
+        """
+        a = (round(origin['lat'], 6), round(origin['lng'], 6))
+        b = (round(destination['lat'], 6), round(destination['lng'], 6))
+        return (a, b) if a <= b else (b, a)
+
+    @staticmethod
+    def _db_key(cache_key: tuple) -> str:
+        """
+        🔑 Représentation texte de la clé canonique pour la table SQLite.
+        """
+        a, b = cache_key
+        return f"{a[0]:.6f},{a[1]:.6f}-{b[0]:.6f},{b[1]:.6f}"
+
     def _get_walking_distance_cached(self, origin: Dict[str, float], destination: Dict[str, float]) -> Optional[int]:
         """
         🚶 Obtient la distance de marche avec cache intelligent
         """
-        cache_key = f"{origin['lat']:.6f},{origin['lng']:.6f}-{destination['lat']:.6f},{destination['lng']:.6f}"
+        cache_key = self._distance_cache_key(origin, destination)
         
         if cache_key in self.distance_cache:
             return self.distance_cache[cache_key]
+
+        # Cache persistant (exécutions précédentes sur la même ville)
+        stored = self._db_get_distance(cache_key)
+        if stored is not None:
+            self.distance_cache[cache_key] = stored
+            return stored
         
         # Appel API Google Directions
         try:
@@ -1071,7 +1562,7 @@ class RouteOptimizer:
                 "key": self.google_api_key
             }
             
-            response = requests.get(self.directions_base_url, params=params, timeout=10)
+            response = self._http.get(self.directions_base_url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -1079,6 +1570,7 @@ class RouteOptimizer:
                 if data["status"] == "OK" and data["routes"]:
                     distance = data["routes"][0]["legs"][0]["distance"]["value"]
                     self.distance_cache[cache_key] = distance
+                    self._db_put_distance(cache_key, distance)
                     return distance
         
         except Exception as e:
@@ -1095,15 +1587,19 @@ class RouteOptimizer:
         lng_diff = origin["lng"] - destination["lng"]
         
         # Approximation : 1 degré ≈ 111km
-        distance_km = math.sqrt(lat_diff**2 + lng_diff**2) * 111
+        distance_km = math.hypot(lat_diff, lng_diff) * 111
         return distance_km * 1000  # Convertir en mètres
     
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _walking_minutes_from_meters(distance_m: int) -> int:
+        return int(distance_m / _METERS_PER_WALKING_MINUTE)
+
     def _distance_to_walking_minutes(self, distance_meters: float) -> int:
         """
-        ⏱️ Convertit distance en temps de marche (5 km/h)
+        ⏱️ Convertit distance en temps de marche (5 km/h), mémoïsé au mètre
         """
-        walking_speed_ms = 1.39  # 5 km/h = 1.39 m/s
-        return int((distance_meters / walking_speed_ms) / 60)
+        return self._walking_minutes_from_meters(int(distance_meters))
 
     def _optimize_with_google_directions(
         self,
@@ -1122,6 +1618,29 @@ class RouteOptimizer:
             if not origin or not destination:
                 return None
 
+            # Tour compact (diagonale < 1 km) : l'ordre local NN + 2-opt est
+            # déjà quasi optimal à cette échelle, le détour réseau ne rapporte
+            # rien
+            coords = self._points_coords(points)
+            lat_span = (coords[:, 0].max() - coords[:, 0].min()) * 111_000
+            mid_rad = math.radians(float(coords[:, 0].mean()))
+            lng_span = (coords[:, 1].max() - coords[:, 1].min()) * 111_000 * math.cos(mid_rad)
+            if math.hypot(lat_span, lng_span) < 1000:
+                return None
+
+            # Signature indépendante de l'ordre : un même ensemble de points
+            # réutilise le réordonnancement déjà payé (hors réindexation
+            # globale, qui dépend de l'appelant)
+            signature = None
+            if base_global_index is None:
+                signature = tuple(sorted(
+                    p.get("place_id") or f"{p['location']['lat']},{p['location']['lng']}"
+                    for p in points
+                ))
+                cached = self.directions_optim_cache.get(signature)
+                if cached is not None:
+                    return cached
+
             waypoint_points = points[1:-1]
             if not waypoint_points:
                 return None
@@ -1143,7 +1662,7 @@ class RouteOptimizer:
                 "key": self.google_api_key
             }
 
-            response = requests.get(self.directions_base_url, params=params, timeout=12)
+            response = self._http.get(self.directions_base_url, params=params, timeout=12)
             if response.status_code != 200:
                 return None
 
@@ -1196,37 +1715,79 @@ class RouteOptimizer:
 
                 reordered_points.append(new_point)
 
-            return {
+            result = {
                 "points": reordered_points,
                 "total_distance": total_distance,
                 "estimated_walking_time": total_time
             }
+            if signature is not None:
+                self.directions_optim_cache[signature] = result
+            return result
 
         except Exception as error:
             if VERBOSE_LOGS:
                 logger.debug("⚠️ Optimisation Google Directions échouée: %s", error)
         return None
     
-    def _build_distance_matrix_for_cluster(self, cluster: List[Dict[str, Any]]) -> List[List[int]]:
+    def _build_distance_matrix_for_cluster(self, cluster: List[Dict[str, Any]]) -> "np.ndarray":
         """
         🏗️ Construit la matrice de distances pour un cluster
         """
-        n = len(cluster)
-        distances = [[0] * n for _ in range(n)]
-        
+        return self._location_distance_matrix(
+            [attr["geometry"]["location"] for attr in cluster]
+        )
+
+    def _location_distance_matrix(self, locations: List[Dict[str, float]]) -> "np.ndarray":
+        """
+        🏗️ Matrice de distances (mètres, int32) pour une liste de positions :
+        le repli géométrique est calculé en une passe vectorisée, seuls les
+        lookups cache/API restent pair à pair.
+        """
+        n = len(locations)
+        distances = np.rint(self._haversine_matrix(locations)).astype(np.int32)
+        np.fill_diagonal(distances, 0)
+
+        # Précharger le cache en un ou deux appels Distance Matrix plutôt
+        # que n(n-1)/2 requêtes Directions unitaires
+        self._prefetch_distance_matrix(locations)
+
+        # Les paires encore manquantes (batch indisponible ou éléments en
+        # échec) partent en parallèle au lieu de bloquer la boucle en série
+        self._fetch_distances_parallel([
+            (locations[i], locations[j])
+            for i in range(n) for j in range(i + 1, n)
+        ])
+
         for i in range(n):
             for j in range(i + 1, n):
-                origin = cluster[i]["geometry"]["location"]
-                destination = cluster[j]["geometry"]["location"]
-                
-                distance = self._get_walking_distance_cached(origin, destination)
-                if distance is None:
-                    distance = int(self._euclidean_distance_approx(origin, destination))
-                
-                distances[i][j] = distance
-                distances[j][i] = distance
-        
+                cached = self._get_walking_distance_cached(locations[i], locations[j])
+                if cached is not None:
+                    distances[i, j] = cached
+                    distances[j, i] = cached
+
         return distances
+
+    def _prefetch_distance_matrix(self, locations: List[Dict[str, float]]):
+        """
+        📡 Remplit le cache de distances via l'API batch quand suffisamment
+        de paires manquent (en deçà, les appels unitaires suffisent).
+        """
+        if self._matrix_batch_unavailable:
+            return
+
+        n = len(locations)
+        missing = 0
+        for i in range(n):
+            for j in range(i + 1, n):
+                if self._distance_cache_key(locations[i], locations[j]) not in self.distance_cache:
+                    missing += 1
+                    if missing > 4:
+                        if self._fetch_distance_matrix_batched(locations) is None:
+                            # Aucun bloc n'a abouti : inutile de retenter le
+                            # batch à chaque matrice, le fan-out unitaire prend
+                            # le relais pour le reste de l'exécution
+                            self._matrix_batch_unavailable = True
+                        return
     
     def _find_cluster_start_point(self, cluster: List[Dict[str, Any]]) -> int:
         """
@@ -1235,45 +1796,49 @@ class RouteOptimizer:
         if len(cluster) <= 2:
             return 0
 
+        # Coordonnées du cluster en tableau (k, 2) : bounding box, centroïde
+        # et distances au centroïde calculés en vectoriel
+        coords = np.asarray(
+            [
+                [attr["geometry"]["location"]["lat"], attr["geometry"]["location"]["lng"]]
+                for attr in cluster
+            ],
+            dtype=np.float64,
+        )
+        lats = coords[:, 0]
+        lngs = coords[:, 1]
+
         # Calcul de la bounding box et du ratio largeur/hauteur (mètres approximatifs)
-        lats = [attr["geometry"]["location"]["lat"] for attr in cluster]
-        lngs = [attr["geometry"]["location"]["lng"] for attr in cluster]
-        min_lat, max_lat = min(lats), max(lats)
-        min_lng, max_lng = min(lngs), max(lngs)
+        min_lat, max_lat = float(lats.min()), float(lats.max())
+        min_lng, max_lng = float(lngs.min()), float(lngs.max())
         mid_lat_rad = math.radians((min_lat + max_lat) / 2)
+        cos_mid = math.cos(mid_lat_rad)  # calculé une fois pour tout le cluster
         height_m = (max_lat - min_lat) * 111_000  # 1° lat ≈ 111 km
-        width_m = (max_lng - min_lng) * 111_000 * math.cos(mid_lat_rad)
+        width_m = (max_lng - min_lng) * 111_000 * cos_mid
         height_m = max(height_m, 1e-6)  # éviter la division par zéro
         width_m = max(width_m, 1e-6)
         elongation_ratio = width_m / height_m
         elongated = elongation_ratio >= 1.6
 
-        # Centroïde géométrique
-        centroid_lat = sum(lats) / len(lats)
-        centroid_lng = sum(lngs) / len(lngs)
-
-        def _centroid_distance(attr: Dict[str, Any]) -> float:
-            loc = attr["geometry"]["location"]
-            d_lat = (loc["lat"] - centroid_lat) * 111_000
-            d_lng = (loc["lng"] - centroid_lng) * 111_000 * math.cos(mid_lat_rad)
-            return math.sqrt(d_lat**2 + d_lng**2)
-
-        # Détection des points isolés (> 3 km de leur plus proche voisin)
-        neighbor_min_dist: List[float] = []
-        for i, a in enumerate(cluster):
-            loc_a = a["geometry"]["location"]
-            best = float("inf")
-            for j, b in enumerate(cluster):
-                if i == j:
-                    continue
-                loc_b = b["geometry"]["location"]
-                dist = self._point_distance(
-                    {"location": loc_a},
-                    {"location": loc_b}
-                )
-                if dist < best:
-                    best = dist
-            neighbor_min_dist.append(best)
+        # Centroïde géométrique et distances au centroïde (une passe)
+        centroid_lat = float(lats.mean())
+        centroid_lng = float(lngs.mean())
+        centroid_dists = np.hypot(
+            (lats - centroid_lat) * 111_000,
+            (lngs - centroid_lng) * 111_000 * cos_mid,
+        )
+
+        def _centroid_distance(idx: int) -> float:
+            return float(centroid_dists[idx])
+
+        # Détection des points isolés (> 3 km de leur plus proche voisin) :
+        # balayage par paires entièrement vectorisé — cette heuristique
+        # géométrique ne doit jamais déclencher d'appel réseau
+        dlat_m = (lats[:, None] - lats[None, :]) * 111_000
+        dlng_m = (lngs[:, None] - lngs[None, :]) * 111_000 * cos_mid
+        pair_dists = np.hypot(dlat_m, dlng_m)
+        np.fill_diagonal(pair_dists, np.inf)
+        neighbor_min_dist = pair_dists.min(axis=1)
 
         island_threshold = 3000  # mètres
         candidates = [
@@ -1287,7 +1852,7 @@ class RouteOptimizer:
             start_index = 0
             for i, attraction in enumerate(cluster):
                 loc = attraction["geometry"]["location"]
-                distance = math.sqrt((loc["lat"] - centroid_lat) ** 2 + (loc["lng"] - centroid_lng) ** 2)
+                distance = math.hypot(loc["lat"] - centroid_lat, loc["lng"] - centroid_lng)
                 if distance > max_distance:
                     max_distance = distance
                     start_index = i
@@ -1298,70 +1863,41 @@ class RouteOptimizer:
             # Top 20 % des points les plus éloignés du centroïde (au moins 1), puis le moins extrême
             sorted_candidates = sorted(
                 candidates,
-                key=lambda item: _centroid_distance(item[1]),
+                key=lambda item: _centroid_distance(item[0]),
                 reverse=True
             )
             top_k = max(1, math.ceil(len(sorted_candidates) * 0.2))
             farthest_subset = sorted_candidates[:top_k]
-            chosen = min(farthest_subset, key=lambda item: _centroid_distance(item[1]))
+            chosen = min(farthest_subset, key=lambda item: _centroid_distance(item[0]))
             return chosen[0]
         else:
             # Cluster compact : point le plus central
-            chosen = min(candidates, key=lambda item: _centroid_distance(item[1]))
+            chosen = min(candidates, key=lambda item: _centroid_distance(item[0]))
             return chosen[0]
     
-    def _nearest_neighbor_from_start(self, start_idx: int, distances: List[List[int]]) -> Tuple[List[int], int]:
+    def _nearest_neighbor_from_start(self, start_idx: int, distances) -> Tuple[List[int], int]:
         """
         🔍 Algorithme du plus proche voisin depuis un point de départ
+        (noyau compilé sur tableaux)
         """
-        n = len(distances)
-        unvisited = set(range(n))
-        path = [start_idx]
-        current = start_idx
-        total_distance = 0
-        unvisited.remove(start_idx)
-        
-        while unvisited:
-            nearest = min(unvisited, key=lambda x: distances[current][x])
-            total_distance += distances[current][nearest]
-            path.append(nearest)
-            current = nearest
-            unvisited.remove(nearest)
-        
-        return path, total_distance
+        dist = np.ascontiguousarray(distances, dtype=np.int32)
+        if dist.shape[0] == 1:
+            return [start_idx], 0
+        path, total_distance = nearest_neighbor_kernel(start_idx, dist)
+        return [int(idx) for idx in path], int(total_distance)
     
-    def _two_opt_improvement(self, path: List[int], distances: List[List[int]]) -> Tuple[List[int], int]:
+    def _two_opt_improvement(self, path: List[int], distances) -> Tuple[List[int], int]:
         """
-        🔧 Amélioration 2-opt du parcours
+        🔧 Amélioration 2-opt du parcours (noyau compilé sur tableaux)
         """
-        def calculate_path_distance(p: List[int]) -> int:
-            return sum(distances[p[i]][p[i + 1]] for i in range(len(p) - 1))
-        
-        best_path = path[:]
-        best_distance = calculate_path_distance(best_path)
-        improved = True
-        iterations = 0
-        max_iterations = 50
-        
-        while improved and iterations < max_iterations:
-            improved = False
-            iterations += 1
-            
-            for i in range(1, len(path) - 2):
-                for j in range(i + 1, len(path)):
-                    if j - i == 1:
-                        continue
-                    
-                    new_path = path[:i] + path[i:j][::-1] + path[j:]
-                    new_distance = calculate_path_distance(new_path)
-                    
-                    if new_distance < best_distance:
-                        best_path = new_path[:]
-                        best_distance = new_distance
-                        path = new_path[:]
-                        improved = True
-        
-        return best_path, best_distance
+        if len(path) < 4:
+            total = sum(distances[path[i]][path[i + 1]] for i in range(len(path) - 1))
+            return path[:], int(total)
+
+        dist = np.ascontiguousarray(distances, dtype=np.int32)
+        path_arr = np.asarray(path, dtype=np.int32)
+        best_path, best_distance = two_opt_kernel(path_arr, dist)
+        return [int(idx) for idx in best_path], int(best_distance)
     
     def _format_for_compatibility(self, optimized_tours: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -1402,14 +1938,14 @@ class RouteOptimizer:
                 "key": self.google_api_key
             }
             
-            response = requests.get(self.directions_base_url, params=params, timeout=10)
+            response = self._http.get(self.directions_base_url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
                 
                 if data["status"] == "OK" and data["routes"]:
                     overview_polyline = data["routes"][0]["overview_polyline"]["points"]
-                    coordinates = polyline.decode(overview_polyline)
+                    coordinates = _decode_polyline(overview_polyline)
                     
                     path_coords = [{"lat": lat, "lng": lng} for lat, lng in coordinates]
                     normalized_path = ensure_path_endpoints(path_coords, origin, destination)
@@ -1476,14 +2012,32 @@ class RouteOptimizer:
             "generation_version": "clustering"
         }
         
-        # Sauvegarder
-        with open(route_file, "w", encoding="utf-8") as f:
-            json.dump(enriched_data, f, ensure_ascii=False, indent=2)
-        
-        with open(backup_file, "w", encoding="utf-8") as f:
-            json.dump(enriched_data, f, ensure_ascii=False, indent=2)
+        # Sauvegarder : sérialisation unique (réutilisée pour le backup),
+        # via orjson quand disponible (OPT_SERIALIZE_NUMPY couvre les
+        # scalaires numpy résiduels)
+        if orjson is not None:
+            payload = orjson.dumps(
+                enriched_data,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+            )
+            with open(route_file, "wb") as f:
+                f.write(payload)
+            with open(backup_file, "wb") as f:
+                f.write(payload)
+        else:
+            payload = json.dumps(enriched_data, ensure_ascii=False, indent=2)
+            with open(route_file, "w", encoding="utf-8") as f:
+                f.write(payload)
+            with open(backup_file, "w", encoding="utf-8") as f:
+                f.write(payload)
         
         logger.info("💾 Itinéraire sauvegardé: %s", route_file)
         logger.info("💾 Backup créé: %s", backup_file)
         
         return route_file
+
+
+_CONNECTION_TYPE_LOOKUP.update({
+    combo: RouteOptimizer._classify_connection(*combo)
+    for combo in product((False, True), repeat=4)
+})
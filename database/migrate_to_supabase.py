@@ -3,17 +3,29 @@ SupabaseMigrator - Migration transparente avec structure existante
 🎯 ZÉRO modification de schema - Adaptation intelligente des données clustering
 🖼️ Enrichissement automatique avec URLs Google Photos
 """
+import asyncio
 import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, Any, List, Callable
 
 # Ajouter le répertoire parent pour importer utils
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+import httpx
 from supabase import create_client, Client
 from dotenv import load_dotenv
+
+try:
+    import orjson
+
+    def _json_load_file(f):
+        return orjson.loads(f.read())
+except ImportError:  # orjson optionnel : repli sur le module standard
+    def _json_load_file(f):
+        return json.load(f)
 from utils.photo_url_generator import GooglePhotoURLGenerator
 from utils.logging_config import get_logger, verbose_logging_enabled
 
@@ -23,6 +35,11 @@ load_dotenv()
 logger = get_logger(__name__)
 VERBOSE_LOGS = verbose_logging_enabled()
 
+
+def _normalize_name(value: str) -> str:
+    """Nom de ville/pays normalisé (espaces de bord retirés, minuscules)."""
+    return value.strip().lower()
+
 class SupabaseMigrator:
     def __init__(self):
         """Initialise le migrateur - Utilise la structure existante parfaite"""
@@ -37,6 +54,7 @@ class SupabaseMigrator:
         
         try:
             self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
+            self._configure_keepalive_session()
             logger.info("✅ Supabase connecté")
         except Exception as e:
             logger.warning("⚠️ Erreur connexion Supabase: %s", e)
@@ -51,11 +69,32 @@ class SupabaseMigrator:
             logger.warning("⚠️ Générateur photos indisponible: %s", e)
             self.photo_generator = None
     
+    def _configure_keepalive_session(self):
+        """
+        🔌 Force une session PostgREST poolée (keep-alive + HTTP/2) : les
+        dizaines d'appels d'une migration partagent la même connexion TLS
+        au lieu de payer un handshake chacun.
+        """
+        try:
+            old_session = self.supabase.postgrest.session
+            self.supabase.postgrest.session = httpx.Client(
+                base_url=old_session.base_url,
+                headers=old_session.headers,
+                timeout=30,
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60),
+            )
+            logger.debug("🔌 Session PostgREST keep-alive HTTP/2 configurée")
+        except Exception as e:
+            # Selon la version de supabase-py l'attribut peut différer :
+            # on garde alors la session par défaut
+            logger.debug("⚠️ Session keep-alive non configurée: %s", e)
+
     def load_route_data(self, file_path: str = "data/optimized_route.json") -> Dict[str, Any]:
         """Charge les données clustering depuis le fichier JSON"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(file_path, 'rb') as f:
+                data = _json_load_file(f)
             
             # Vérifier si c'est bien des données V2
             version = data.get("version", "")
@@ -76,7 +115,7 @@ class SupabaseMigrator:
                 
         except FileNotFoundError:
             raise FileNotFoundError(f"Le fichier {file_path} n'existe pas")
-        except json.JSONDecodeError:
+        except ValueError:
             raise ValueError(f"Le fichier {file_path} contient du JSON invalide")
     
     def _adapt_v1_structure(self, v1_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -139,8 +178,8 @@ class SupabaseMigrator:
         """Vérifie si une ville existe déjà dans la structure existante"""
         try:
             # Normaliser les noms en minuscules pour éviter les doublons de casse
-            city_normalized = city.lower().strip()
-            country_normalized = country.lower().strip()
+            city_normalized = _normalize_name(city)
+            country_normalized = _normalize_name(country)
             
             # 1. Vérifier d'abord par place_id si disponible (plus fiable)
             if place_id:
@@ -151,30 +190,22 @@ class SupabaseMigrator:
                     print(f"✅ Ville existante trouvée par place_id: {city}, {country}")
                     return place_result.data[0]
             
-            # 2. Recherche par (ville + pays) - essayer d'abord les valeurs exactes
-            city_query_exact = self.supabase.table("cities").select("*").eq("city", city.strip()).eq("country", country.strip())
-            city_result_exact = city_query_exact.execute()
-            
-            if city_result_exact.data:
-                print(f"✅ Ville existante trouvée par nom exact: {city}, {country}")
-                return city_result_exact.data[0]
-            
-            # 3. Fallback par (ville + pays) normalisés en minuscules
-            city_query_normalized = self.supabase.table("cities").select("*").eq("city", city_normalized).eq("country", country_normalized)
-            city_result_normalized = city_query_normalized.execute()
-            
-            if city_result_normalized.data:
-                print(f"✅ Ville existante trouvée par nom normalisé: {city}, {country}")
-                return city_result_normalized.data[0]
-            
-            # 4. Recherche case-insensitive étendue (au cas où les données auraient des casses mixtes)
-            all_cities = self.supabase.table("cities").select("*").execute()
-            if all_cities.data:
-                for existing_city in all_cities.data:
-                    if (existing_city['city'].lower().strip() == city_normalized and 
-                        existing_city['country'].lower().strip() == country_normalized):
-                        print(f"✅ Ville existante trouvée par recherche étendue: {city}, {country}")
-                        return existing_city
+            # 2. Recherche (ville + pays) insensible à la casse en UN SEUL
+            # appel filtré côté serveur : ilike sans joker = égalité
+            # case-insensitive, ce qui couvre valeurs exactes, normalisées
+            # et casses mixtes sans rapatrier toute la table
+            city_result = (
+                self.supabase.table("cities")
+                .select("*")
+                .ilike("city", city_normalized)
+                .ilike("country", country_normalized)
+                .limit(1)
+                .execute()
+            )
+
+            if city_result.data:
+                print(f"✅ Ville existante trouvée par nom (insensible à la casse): {city}, {country}")
+                return city_result.data[0]
             
             print(f"🔍 Nouvelle ville: {city}, {country}")
             return None
@@ -194,20 +225,42 @@ class SupabaseMigrator:
             country_iso_code = route_data.get("country_iso_code")
             
             # Normaliser les noms en minuscules pour éviter les doublons
-            city_normalized = city.lower().strip()
-            country_normalized = country.lower().strip()
-            
-            # Vérifier si la ville existe
-            existing_city = self.check_city_exists(city, country, place_id, country_iso_code)
+            # (une seule passe strip+lower par valeur pour tout l'appel)
+            city_normalized = _normalize_name(city)
+            country_normalized = _normalize_name(country)
             
+            # Horodatage unique pour toute l'opération
+            now_iso = datetime.now().isoformat()
+
             # Données ville - SEULEMENT ce qui existe dans le schema avec noms normalisés
+            # (created_at est laissé au DEFAULT now() de la table)
             city_data = {
                 "city": city_normalized,
                 "country": country_normalized,
                 "place_id": place_id,
                 "country_iso_code": country_iso_code,
-                "updated_at": datetime.now().isoformat()
+                "updated_at": now_iso
             }
+
+            # Avec un place_id, UN SEUL upsert suffit (index unique
+            # cities_place_id_uidx) : plus de check-puis-insert, et plus de
+            # course entre deux migrations concurrentes
+            if place_id:
+                try:
+                    result = self.supabase.table("cities").upsert(
+                        city_data, on_conflict="place_id"
+                    ).execute()
+                    if result.data:
+                        city_id = result.data[0]["id"]
+                        print(f"✅ Ville upsertée: {city_id}")
+                        return city_id
+                except Exception as upsert_error:
+                    # Index unique pas encore déployé : repli sur le chemin
+                    # check-then-insert historique
+                    print(f"⚠️ Upsert ville indisponible ({upsert_error}), insertion classique")
+
+            # Vérifier si la ville existe
+            existing_city = self.check_city_exists(city, country, place_id, country_iso_code)
             
             if existing_city:
                 # Mettre à jour la ville existante
@@ -222,7 +275,7 @@ class SupabaseMigrator:
             else:
                 # Créer nouvelle ville
                 print(f"🆕 Création nouvelle ville: {city}")
-                city_data["created_at"] = datetime.now().isoformat()
+                city_data["created_at"] = now_iso
                 
                 result = self.supabase.table("cities").insert(city_data).execute()
                 
@@ -249,6 +302,21 @@ class SupabaseMigrator:
             
             attractions_data = []
             global_index_to_id = {}
+            # Un seul horodatage pour toutes les lignes de la migration
+            now_iso = datetime.now().isoformat()
+
+            # Index O(1) construits une fois : plus de balayage linéaire des
+            # sources pour chaque point de chaque tour
+            by_place_id = {
+                source["place_id"]: source
+                for source in (source_attractions or [])
+                if source.get("place_id")
+            }
+            by_name = {
+                source["name"].strip().lower(): source
+                for source in (source_attractions or [])
+                if source.get("name")
+            }
             
             logger.info("🔄 Traitement des attractions depuis %s tours...", len(tours))
             if source_attractions:
@@ -266,7 +334,7 @@ class SupabaseMigrator:
                         continue
                     
                     # 🔍 Enrichir avec les données sources (photos, ai_description, etc.)
-                    enriched_point = self._enrich_point_with_source_data(point, source_attractions)
+                    enriched_point = self._enrich_point_with_source_data(point, by_place_id, by_name)
                     
                     # Données attraction - STRUCTURE EXISTANTE SEULEMENT
                     location = enriched_point.get("location", {})
@@ -292,7 +360,7 @@ class SupabaseMigrator:
                         "rating": enriched_point.get("rating"),
                         "types": enriched_point.get("types", []),
                         "photos": enriched_point.get("photos", []),  # Photos sources complètes
-                        "created_at": datetime.now().isoformat()
+                        "created_at": now_iso
                     }
                     
                     attractions_data.append(attraction_data)
@@ -300,15 +368,15 @@ class SupabaseMigrator:
             # Insertion en lot
             if attractions_data:
                 logger.debug("🚀 Insertion de %s attractions...", len(attractions_data))
-                result = self.supabase.table("attractions").insert(attractions_data).execute()
+                inserted_rows = self._bulk_insert_attractions(attractions_data)
                 
-                if result.data:
+                if inserted_rows:
                     # Construire le mapping global_index → attraction_id
-                    for attraction in result.data:
+                    for attraction in inserted_rows:
                         global_index = attraction["route_index"]
                         global_index_to_id[global_index] = attraction["id"]
                     
-                    logger.debug("✅ %s attractions créées", len(result.data))
+                    logger.debug("✅ %s attractions créées", len(inserted_rows))
                     return global_index_to_id
             
             return {}
@@ -317,6 +385,25 @@ class SupabaseMigrator:
             logger.error("❌ Erreur création attractions: %s", e)
             raise
     
+    def _bulk_insert_attractions(self, attractions_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insertion en masse via la fonction bulk_insert_attractions
+        (jsonb_to_recordset côté Postgres : un seul payload jsonb, pas de
+        colonnes répétées par ligne) avec repli sur l'insert PostgREST.
+        """
+        try:
+            result = self.supabase.rpc(
+                "bulk_insert_attractions", {"p_attractions": attractions_data}
+            ).execute()
+            if result.data:
+                return result.data
+        except Exception as rpc_error:
+            # Fonction absente (base pas encore à jour) : insert classique
+            logger.warning("⚠️ RPC bulk_insert_attractions indisponible (%s), insertion PostgREST", rpc_error)
+
+        result = self.supabase.table("attractions").insert(attractions_data).execute()
+        return result.data or []
+
     def create_guided_tours_from_clusters(self, city_id: str, tours: List[Dict[str, Any]], 
                                         global_index_to_attraction_id: Dict[int, str]) -> List[str]:
         """
@@ -324,8 +411,14 @@ class SupabaseMigrator:
         1 cluster = 1 guided_tour
         """
         try:
-            guided_tour_ids = []
-            
+            if not tours:
+                return []
+
+            # Construire tous les guided_tours puis les insérer en UN SEUL
+            # appel multi-lignes (PostgREST renvoie les lignes dans l'ordre
+            # d'insertion) au lieu d'un aller-retour par cluster
+            now_iso = datetime.now().isoformat()
+            all_guided_tours = []
             for i, tour in enumerate(tours):
                 cluster_id = tour.get("cluster_id", i + 1)
                 stats = tour.get("stats", {})
@@ -342,65 +435,70 @@ class SupabaseMigrator:
                     "point_count": len(points),
                     "start_point": points[0]["name"] if points else None,
                     "end_point": points[-1]["name"] if len(points) > 1 else None,
-                    "created_at": datetime.now().isoformat(),
-                    "updated_at": datetime.now().isoformat()
+                    "created_at": now_iso,
+                    "updated_at": now_iso
                 }
                 
                 if VERBOSE_LOGS:
                     logger.debug("🔄 Création guided_tour: %s", guided_tour_data['tour_name'])
-                
-                # Insérer le guided_tour
-                tour_result = self.supabase.table("guided_tours").insert(guided_tour_data).execute()
-                
-                if tour_result.data:
-                    guided_tour_uuid = tour_result.data[0]["id"]
-                    guided_tour_ids.append(guided_tour_uuid)
-                    
-                    logger.debug("✅ Guided_tour créé: %s", guided_tour_uuid)
-                    
-                    # Créer les tour_points pour ce guided_tour
-                    self._create_tour_points_for_cluster(guided_tour_uuid, points, global_index_to_attraction_id)
-            
+
+                all_guided_tours.append(guided_tour_data)
+
+            result = self.supabase.table("guided_tours").insert(all_guided_tours).execute()
+            if not result.data:
+                return []
+
+            guided_tour_ids = [row["id"] for row in result.data]
+            logger.debug("✅ %s guided_tours créés", len(guided_tour_ids))
+
+            # Consolider les tour_points de TOUS les tours en un seul insert
+            tour_points_data = []
+            for tour, tour_row in zip(tours, result.data):
+                tour_points_data.extend(
+                    self._build_tour_points_for_cluster(
+                        tour_row["id"], tour.get("points", []), global_index_to_attraction_id, now_iso
+                    )
+                )
+
+            if tour_points_data:
+                points_result = self.supabase.table("tour_points").insert(tour_points_data).execute()
+                if points_result.data:
+                    logger.debug("  ✅ %s tour_points créés", len(points_result.data))
+
             return guided_tour_ids
             
         except Exception as e:
             logger.error("❌ Erreur création guided_tours: %s", e)
             raise
     
-    def _create_tour_points_for_cluster(self, guided_tour_uuid: str, points: List[Dict[str, Any]], 
-                                       global_index_to_attraction_id: Dict[int, str]):
+    def _build_tour_points_for_cluster(self, guided_tour_uuid: str, points: List[Dict[str, Any]], 
+                                       global_index_to_attraction_id: Dict[int, str],
+                                       now_iso: str = None) -> List[Dict[str, Any]]:
         """
-        Crée les tour_points pour un guided_tour - STRUCTURE EXISTANTE
+        Construit les lignes tour_points d'un guided_tour - STRUCTURE EXISTANTE
         """
-        try:
-            tour_points_data = []
-            
-            for cluster_index, point in enumerate(points):
-                global_index = point.get("global_index", cluster_index)
-                attraction_id = global_index_to_attraction_id.get(global_index)
-                
-                if attraction_id:
-                    # Données tour_point - STRUCTURE EXISTANTE SEULEMENT
-                    tour_point_data = {
-                        "tour_id": guided_tour_uuid,
-                        "attraction_id": attraction_id,
-                        "point_order": cluster_index + 1,  # Ordre dans ce tour (1, 2, 3...)
-                        "global_index": global_index,  # Ordre global préservé
-                        "created_at": datetime.now().isoformat()
-                    }
-                    tour_points_data.append(tour_point_data)
-                else:
-                    if VERBOSE_LOGS:
-                        logger.debug("⚠️ Attraction manquante pour global_index %s", global_index)
-            
-            if tour_points_data:
-                result = self.supabase.table("tour_points").insert(tour_points_data).execute()
-                if result.data:
-                    logger.debug("  ✅ %s tour_points créés", len(result.data))
-            
-        except Exception as e:
-            logger.error("❌ Erreur création tour_points: %s", e)
-            raise
+        tour_points_data = []
+        now_iso = now_iso or datetime.now().isoformat()
+        
+        for cluster_index, point in enumerate(points):
+            global_index = point.get("global_index", cluster_index)
+            attraction_id = global_index_to_attraction_id.get(global_index)
+            
+            if attraction_id:
+                # Données tour_point - STRUCTURE EXISTANTE SEULEMENT
+                tour_point_data = {
+                    "tour_id": guided_tour_uuid,
+                    "attraction_id": attraction_id,
+                    "point_order": cluster_index + 1,  # Ordre dans ce tour (1, 2, 3...)
+                    "global_index": global_index,  # Ordre global préservé
+                    "created_at": now_iso
+                }
+                tour_points_data.append(tour_point_data)
+            else:
+                if VERBOSE_LOGS:
+                    logger.debug("⚠️ Attraction manquante pour global_index %s", global_index)
+
+        return tour_points_data
     
     
     def migrate_route_data(self, file_path: str = "data/optimized_route.json") -> bool:
@@ -494,10 +592,38 @@ class SupabaseMigrator:
                 "attractions_count": 0
             }
     
+    async def migrate_route_data_async(self, file_path: str = "data/optimized_route.json") -> bool:
+        """
+        🚀 Variante asynchrone : la migration (I/O bloquante supabase-py)
+        part dans un thread pour ne pas figer la boucle d'événements.
+        """
+        return await asyncio.to_thread(self.migrate_route_data, file_path)
+
+    async def migrate_route_data_with_source_attractions_async(
+        self, route_data: Dict[str, Any], source_attractions: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        🚀 Variante asynchrone de la migration avec données directes (API).
+        """
+        return await asyncio.to_thread(
+            self.migrate_route_data_with_source_attractions, route_data, source_attractions
+        )
+
     def _clean_existing_city_data(self, city_id: str):
         """Nettoie les anciennes données pour une ville (structure existante) - TOUTES LES TABLES"""
         try:
             logger.info("🧹 Nettoyage complet des données existantes...")
+
+            # Un seul aller-retour : la cascade complète est exécutée côté
+            # Postgres par la fonction clean_city_data (cf. supabase_rpc.sql)
+            try:
+                self.supabase.rpc("clean_city_data", {"p_city_id": city_id}).execute()
+                logger.info("✅ Nettoyage complet terminé (RPC) - TOUTES les données liées supprimées")
+                return
+            except Exception as rpc_error:
+                # Fonction absente (base pas encore à jour) : repli sur les
+                # suppressions séquentielles historiques
+                logger.warning("⚠️ RPC clean_city_data indisponible (%s), nettoyage séquentiel", rpc_error)
             
             # Récupérer tous les guided_tours de cette ville pour les suppressions en cascade
             guided_tours_result = self.supabase.table("guided_tours").select("id").eq("city_id", city_id).execute()
@@ -515,14 +641,19 @@ class SupabaseMigrator:
                     if VERBOSE_LOGS:
                         logger.debug("   💰 %s tour_purchases trouvés à nettoyer", len(purchase_ids))
                     
-                    # 1. tour_participants (dépend de tour_purchases)
-                    participants_result = self.supabase.table("tour_participants").delete().in_("tour_purchase_id", purchase_ids).execute()
+                    # 1+2. tour_participants et tour_invitations ne dépendent
+                    # que de tour_purchases : suppression en parallèle
+                    with ThreadPoolExecutor(max_workers=2) as executor:
+                        participants_future = executor.submit(
+                            lambda: self.supabase.table("tour_participants").delete().in_("tour_purchase_id", purchase_ids).execute()
+                        )
+                        invitations_future = executor.submit(
+                            lambda: self.supabase.table("tour_invitations").delete().in_("tour_purchase_id", purchase_ids).execute()
+                        )
+                        participants_result = participants_future.result()
+                        invitations_result = invitations_future.result()
                     if VERBOSE_LOGS:
                         logger.debug("   👥 %s tour_participants supprimés", len(participants_result.data) if participants_result.data else 0)
-                    
-                    # 2. tour_invitations (dépend de tour_purchases)
-                    invitations_result = self.supabase.table("tour_invitations").delete().in_("tour_purchase_id", purchase_ids).execute()
-                    if VERBOSE_LOGS:
                         logger.debug("   📮 %s tour_invitations supprimées", len(invitations_result.data) if invitations_result.data else 0)
                     
                     # 3. tour_purchases (dépend de guided_tours)
@@ -530,14 +661,19 @@ class SupabaseMigrator:
                     if VERBOSE_LOGS:
                         logger.debug("   💰 %s tour_purchases supprimés", len(purchases_delete_result.data) if purchases_delete_result.data else 0)
                 
-                # 4. walking_paths (dépend de guided_tours)
-                walking_paths_result = self.supabase.table("walking_paths").delete().in_("tour_id", guided_tour_ids).execute()
+                # 4+5. walking_paths et tour_points ne dépendent que de
+                # guided_tours : suppression en parallèle
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    walking_paths_future = executor.submit(
+                        lambda: self.supabase.table("walking_paths").delete().in_("tour_id", guided_tour_ids).execute()
+                    )
+                    tour_points_future = executor.submit(
+                        lambda: self.supabase.table("tour_points").delete().in_("tour_id", guided_tour_ids).execute()
+                    )
+                    walking_paths_result = walking_paths_future.result()
+                    tour_points_result = tour_points_future.result()
                 if VERBOSE_LOGS:
                     logger.debug("   🚶 %s walking_paths supprimés", len(walking_paths_result.data) if walking_paths_result.data else 0)
-                
-                # 5. tour_points (dépend de guided_tours)  
-                tour_points_result = self.supabase.table("tour_points").delete().in_("tour_id", guided_tour_ids).execute()
-                if VERBOSE_LOGS:
                     logger.debug("   📍 %s tour_points supprimés", len(tour_points_result.data) if tour_points_result.data else 0)
                 
                 # 6. guided_tours (dépend de cities)
@@ -567,8 +703,8 @@ class SupabaseMigrator:
                 logger.debug("⚠️  Fichier source %s non trouvé - pas d'enrichissement photos", source_file)
                 return []
             
-            with open(source_file, 'r', encoding='utf-8') as f:
-                source_data = json.load(f)
+            with open(source_file, 'rb') as f:
+                source_data = _json_load_file(f)
             
             attractions = source_data.get("filtered_attractions", [])
             logger.debug("📸 %s attractions sources chargées avec photos", len(attractions))
@@ -578,33 +714,22 @@ class SupabaseMigrator:
             logger.warning("⚠️  Erreur chargement sources: %s", e)
             return []
     
-    def _enrich_point_with_source_data(self, point: Dict[str, Any], source_attractions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _enrich_point_with_source_data(self, point: Dict[str, Any], by_place_id: Dict[str, Dict[str, Any]], by_name: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
         """
         🔍 Enrichit un point de tour avec les données complètes sources (photos, descriptions, etc.)
+        Les correspondances se font via les index précalculés par l'appelant.
         """
-        if not source_attractions:
+        if not by_place_id and not by_name:
             return point
         
         # Rechercher l'attraction source correspondante par place_id ou nom
         place_id = point.get("place_id")
         point_name = point.get("name", "").strip().lower()
         
-        matching_source = None
-        
-        # 1. Recherche par place_id (plus précise)
-        if place_id:
-            for source in source_attractions:
-                if source.get("place_id") == place_id:
-                    matching_source = source
-                    break
-        
-        # 2. Fallback : recherche par nom (moins précise)
+        # 1. Recherche par place_id (plus précise), 2. fallback par nom
+        matching_source = by_place_id.get(place_id) if place_id else None
         if not matching_source and point_name:
-            for source in source_attractions:
-                source_name = source.get("name", "").strip().lower()
-                if source_name == point_name:
-                    matching_source = source
-                    break
+            matching_source = by_name.get(point_name)
         
         if matching_source:
             # Enrichir le point avec toutes les données sources
@@ -809,6 +934,7 @@ class SupabaseMigrator:
             self.supabase.table("walking_paths").delete().eq("tour_id", tour_id).execute()
 
         walking_paths_data: List[Dict[str, Any]] = []
+        now_iso = datetime.now().isoformat()
 
         for idx in range(expected_segments):
             current = ordered_attractions[idx]
@@ -833,7 +959,7 @@ class SupabaseMigrator:
                 "from_attraction_id": current.get("id"),
                 "to_attraction_id": nxt.get("id"),
                 "path_coordinates": path_coordinates,
-                "created_at": datetime.now().isoformat()
+                "created_at": now_iso
             })
 
         if not walking_paths_data:
@@ -897,6 +1023,7 @@ class SupabaseMigrator:
             self.supabase.table("user_walking_paths").delete().eq("user_tour_id", user_tour_id).execute()
 
         walking_paths_data: List[Dict[str, Any]] = []
+        now_iso = datetime.now().isoformat()
 
         for idx in range(expected_segments):
             current = ordered_attractions[idx]
@@ -921,7 +1048,7 @@ class SupabaseMigrator:
                 "from_attraction_id": current.get("id"),
                 "to_attraction_id": nxt.get("id"),
                 "path_coordinates": path_coordinates,
-                "created_at": datetime.now().isoformat()
+                "created_at": now_iso
             })
 
         if not walking_paths_data:
@@ -2009,3 +2009,119 @@ END;
 $function$;
 
 -- =====================================================================
+
+
+-- ============================================================================
+-- FUNCTION: clean_city_data
+-- ============================================================================
+-- Deletes all migration-managed data of a city in one server-side call,
+-- replacing the sequential DELETE round-trips issued by the migrator
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.clean_city_data(
+    p_city_id UUID
+)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path TO 'public'
+AS $$
+BEGIN
+    DELETE FROM public.tour_participants
+    WHERE tour_purchase_id IN (
+        SELECT id FROM public.tour_purchases
+        WHERE tour_id IN (SELECT id FROM public.guided_tours WHERE city_id = p_city_id)
+    );
+
+    DELETE FROM public.tour_invitations
+    WHERE tour_purchase_id IN (
+        SELECT id FROM public.tour_purchases
+        WHERE tour_id IN (SELECT id FROM public.guided_tours WHERE city_id = p_city_id)
+    );
+
+    DELETE FROM public.tour_purchases
+    WHERE tour_id IN (SELECT id FROM public.guided_tours WHERE city_id = p_city_id);
+
+    DELETE FROM public.walking_paths
+    WHERE tour_id IN (SELECT id FROM public.guided_tours WHERE city_id = p_city_id);
+
+    DELETE FROM public.tour_points
+    WHERE tour_id IN (SELECT id FROM public.guided_tours WHERE city_id = p_city_id);
+
+    DELETE FROM public.guided_tours WHERE city_id = p_city_id;
+
+    DELETE FROM public.attractions WHERE city_id = p_city_id;
+END;
+$$;
+
+-- Only the backend (service_role) may run the cascade cleanup
+REVOKE ALL ON FUNCTION public.clean_city_data(UUID) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.clean_city_data(UUID) TO service_role;
+
+
+-- ============================================================================
+-- INDEXES: cities upsert support
+-- ============================================================================
+-- Allow the migrator to upsert a city in a single round-trip and prevent
+-- duplicate rows differing only by case
+-- ============================================================================
+
+-- Index complet (non partiel) : PostgREST émet ON CONFLICT (place_id) sans
+-- prédicat, que Postgres ne peut rapprocher que d'un index non filtré ; un
+-- index unique complet admet de toute façon plusieurs NULL
+CREATE UNIQUE INDEX IF NOT EXISTS cities_place_id_uidx
+    ON public.cities (place_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS cities_name_uidx
+    ON public.cities (lower(city), lower(country));
+
+
+-- ============================================================================
+-- FUNCTION: bulk_insert_attractions
+-- ============================================================================
+-- Inserts a whole city's attractions from one jsonb payload via the native
+-- bulk path (jsonb_to_recordset), returning the id/route_index pairs the
+-- migrator needs to wire tour_points
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.bulk_insert_attractions(
+    p_attractions JSONB
+)
+RETURNS TABLE(id UUID, route_index INTEGER)
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path TO 'public'
+AS $$
+    INSERT INTO public.attractions (
+        city_id, name, formatted_address, lat, lng, route_index,
+        distance_from_previous, walking_time_from_previous,
+        ai_description, place_id, rating, types, photos, created_at
+    )
+    SELECT
+        t.city_id, t.name, t.formatted_address, t.lat, t.lng, t.route_index,
+        COALESCE(t.distance_from_previous, 0),
+        COALESCE(t.walking_time_from_previous, 0),
+        t.ai_description, t.place_id, t.rating, t.types, t.photos,
+        COALESCE(t.created_at, NOW())
+    FROM jsonb_to_recordset(p_attractions) AS t(
+        city_id UUID,
+        name TEXT,
+        formatted_address TEXT,
+        lat NUMERIC,
+        lng NUMERIC,
+        route_index INTEGER,
+        distance_from_previous INTEGER,
+        walking_time_from_previous INTEGER,
+        ai_description JSONB,
+        place_id TEXT,
+        rating NUMERIC,
+        types JSONB,
+        photos JSONB,
+        created_at TIMESTAMPTZ
+    )
+    RETURNING attractions.id, attractions.route_index;
+$$;
+
+-- Only the backend (service_role) may bulk-insert attractions
+REVOKE ALL ON FUNCTION public.bulk_insert_attractions(JSONB) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.bulk_insert_attractions(JSONB) TO service_role;